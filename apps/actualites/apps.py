@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ActualitesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.actualites'
\ No newline at end of file
+    name = 'apps.actualites'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,97 @@
+"""
+Compteurs dénormalisés des articles (like_count, comment_count).
+
+Toujours modifiés par un UPDATE ... SET x = x + n (expressions F) : deux likes ou
+deux commentaires simultanés ne s'écrasent pas. reconcile_counters() corrige une
+éventuelle dérive (suppression en masse, modification directe en base...).
+
+Les likes passent par set_like() : une seule écriture conditionnelle sur la table de
+liaison (INSERT ignoré si la ligne existe / DELETE), dont le nombre de lignes touchées
+donne l'incrément du compteur. Un double clic ne peut donc ni doubler un like ni
+faire dériver like_count.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Article, Comment
+from .page_cache import invalidate_article
+
+
+def _bump(article_id, field, delta):
+    if delta:
+        # Greatest : jamais négatif, même si le compteur avait déjà dérivé
+        Article.objects.filter(pk=article_id).update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def add_likes(article_id, delta):
+    _bump(article_id, 'like_count', delta)
+
+
+def _insert_like(article_id, user_id):
+    """ INSERT sans effet si le like existe déjà (contrainte unique de la table de liaison). """
+    field = Article.likes.field
+    ops = connection.ops
+    sql = '{insert} {table} ({article}, {user}) VALUES (%s, %s) {suffix}'.format(
+        insert=ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        table=ops.quote_name(field.m2m_db_table()),
+        article=ops.quote_name(field.m2m_column_name()),
+        user=ops.quote_name(field.m2m_reverse_name()),
+        suffix=ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [article_id, user_id])
+        return cursor.rowcount
+
+
+def _delete_like(article_id, user_id):
+    deleted, _ = Article.likes.through.objects.filter(
+        **{Article.likes.field.m2m_field_name(): article_id,
+           Article.likes.field.m2m_reverse_field_name(): user_id}
+    ).delete()
+    return deleted
+
+
+def set_like(article_id, user_id, liked=None):
+    """
+    Aime (liked=True) ou n'aime plus (liked=False) un article ; liked=None bascule l'état.
+    Retourne (aimé après l'opération, like_count relu après l'écriture, dans la même transaction).
+    """
+    with transaction.atomic():
+        if liked is None:
+            delta = -_delete_like(article_id, user_id) or _insert_like(article_id, user_id)
+        elif liked:
+            delta = _insert_like(article_id, user_id)
+        else:
+            delta = -_delete_like(article_id, user_id)
+        add_likes(article_id, delta)
+        like_count = Article.objects.filter(pk=article_id).values_list('like_count', flat=True).first()
+    return (delta >= 0 if liked is None else liked), like_count or 0
+
+
+def add_comments(article_id, delta):
+    _bump(article_id, 'comment_count', delta)
+
+
+def _count_subquery(queryset):
+    counts = queryset.filter(article_id=OuterRef('pk')).order_by().values('article_id').annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_counters():
+    """
+    Recalcule les compteurs à partir des likes et commentaires réels, et rafraîchit
+    les pages en cache des articles corrigés. Retourne le nombre d'articles corrigés.
+    """
+    actual = Article.objects.annotate(
+        real_likes=_count_subquery(Article.likes.through.objects.all()),
+        real_comments=_count_subquery(Comment.objects.all()),
+    ).exclude(like_count=F('real_likes'), comment_count=F('real_comments'))
+    slugs = []
+    for article_id, slug, likes, comments in actual.values_list('pk', 'slug', 'real_likes', 'real_comments').iterator():
+        Article.objects.filter(pk=article_id).update(like_count=likes, comment_count=comments)
+        slugs.append(slug)
+    if slugs:
+        invalidate_article(*slugs)
+    return len(slugs)
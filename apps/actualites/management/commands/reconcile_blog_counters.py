@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.actualites.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de likes et de commentaires des articles"
+
+    def handle(self, *args, **options):
+        self.stdout.write("🚀 Vérification des compteurs du blog...")
+        fixed = reconcile_counters()
+        if fixed:
+            self.stdout.write(self.style.WARNING(f"⚠️ {fixed} article(s) corrigé(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Aucune dérive détectée."))
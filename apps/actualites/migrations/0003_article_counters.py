@@ -0,0 +1,40 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Article = apps.get_model('actualites', 'Article')
+    Comment = apps.get_model('actualites', 'Comment')
+
+    def count_of(queryset):
+        counts = queryset.filter(article_id=OuterRef('pk')).order_by().values('article_id').annotate(n=Count('*')).values('n')
+        return Coalesce(Subquery(counts), 0)
+
+    Article.objects.update(
+        like_count=count_of(Article.likes.through.objects.all()),
+        comment_count=count_of(Comment.objects.all()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actualites', '0002_article_likes_alter_article_content_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actualites', '0005_comment_article_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageGeneration',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='page_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
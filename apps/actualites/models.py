@@ -18,6 +18,8 @@ class Article(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     image = models.ImageField(upload_to='blog_images/', blank=True, null=True)
+    # Versions redimensionnées WebP/JPEG de l'image (cf. core/images.py)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     excerpt = models.TextField(verbose_name="Extrait")
     content = models.TextField(verbose_name="Contenu complet")
     is_published = models.BooleanField(default=False)
@@ -25,11 +27,32 @@ class Article(models.Model):
     
     # NOUVEAU : Champ pour les Likes
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='blog_likes', blank=True)
+
+    # Compteurs dénormalisés (cf. actualites/counters.py) : la liste n'a plus besoin
+    # d'un COUNT par article pour les likes et les commentaires
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Version de la page en cache (cf. actualites/page_cache.py), en base : vue par tous les processus
+    page_version = models.PositiveIntegerField(default=0, editable=False)
     
+    # Tenus à jour par des update() ciblés (compteurs, déclinaisons de l'image, version de la page)
+    UPDATE_ONLY_FIELDS = ('like_count', 'comment_count', 'image_derivatives', 'page_version')
+
     def __str__(self): return self.title
+
+    def save(self, *args, **kwargs):
+        # Article existant : une sauvegarde ordinaire (admin maison, /admin) ne réécrit pas
+        # les valeurs de ces champs lues au chargement, peut-être dépassées depuis
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.UPDATE_ONLY_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
 # NOUVEAU : Modèle Commentaire
 class Comment(models.Model):
@@ -40,6 +63,17 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at'] # Les plus récents en premier
+        indexes = [
+            # Pages de commentaires d'un article (curseur (created_at, id) à rebours)
+            models.Index(fields=['article', '-created_at', '-id'], name='comment_article_created_idx'),
+        ]
 
     def __str__(self):
-        return f"Commentaire de {self.author.username} sur {self.article.title}"
\ No newline at end of file
+        return f"Commentaire de {self.author.username} sur {self.article.title}"
+
+class PageGeneration(models.Model):
+    """ Génération des pages de liste du blog en cache (cf. page_cache.py), partagée par tous les processus. """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self): return f"{self.name} ({self.value})"
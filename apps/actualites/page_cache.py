@@ -0,0 +1,96 @@
+"""
+Cache des pages du blog (liste et détail), partagé par tous les visiteurs.
+
+On met en cache le corps de la page (le bloc content, rendu SANS requête ni utilisateur),
+pas la réponse complète : base.html reste rendu à chaque fois (menu connecté/anonyme,
+jeton CSRF, messages flash). Les parties propres au visiteur (bouton like, formulaire
+de commentaire) sont des emplacements SLOT_* remplacés à chaque requête.
+
+Clés (la langue en fait partie : les liens sont préfixés /fr/, /en/) :
+- liste : génération des listes (PageGeneration) + langue + catégorie + page ;
+- détail : id + Article.page_version + langue (un slug repris par un autre article
+  ne retombe pas sur l'ancienne page).
+Les versions sont en base, comme TutorProfile.card_version pour les cartes de l'annuaire :
+une invalidation (update() d'un compteur) est vue par tous les workers et par les
+commandes, même avec le cache LocMem propre à chaque processus. Coût d'une page en
+cache : une requête indexée pour lire la version, au lieu du rendu complet.
+
+Invalidation (signals.py, après commit) :
+- article créé / modifié / publié / supprimé, commentaire ajouté ou supprimé :
+  version de CET article + génération des listes ;
+- catégorie créée / renommée / supprimée : version de tous les articles + listes.
+Un ancien slug (article renommé ou supprimé) ne trouve plus de version : la vue passe
+au rendu normal (404). Les anciennes entrées expirent après BLOG_PAGE_CACHE_TIMEOUT.
+Les likes ne passent pas par là (update() direct) : le nombre affiché aux anonymes
+peut retarder d'au plus BLOG_PAGE_CACHE_TIMEOUT.
+"""
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.translation import get_language
+
+from .models import Article, PageGeneration
+
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 10
+LIST_GENERATION = 'blog_list'
+
+# Emplacements des fragments personnels dans le HTML en cache
+SLOT_LIKE = '<!--blog:like-->'
+SLOT_COMMENT_FORM = '<!--blog:comment-form-->'
+
+
+def _list_generation():
+    return PageGeneration.objects.filter(name=LIST_GENERATION).values_list('value', flat=True).first() or 0
+
+
+def _bump_lists():
+    if not PageGeneration.objects.filter(name=LIST_GENERATION).update(value=F('value') + 1):
+        PageGeneration.objects.get_or_create(name=LIST_GENERATION, defaults={'value': 2})
+
+
+def _list_key(category_slug, page_number):
+    return f'blog_page:list:{_list_generation()}:{get_language()}:{category_slug or ""}:{page_number}'
+
+
+def _detail_key(slug):
+    """ None si aucun article ne porte ce slug : rien à lire ni à ranger. """
+    row = Article.objects.filter(slug=slug).values_list('pk', 'page_version').first()
+    if row is None:
+        return None
+    return f'blog_page:detail:{row[0]}:{row[1]}:{get_language()}'
+
+
+def get_list_page(category_slug, page_number):
+    return cache.get(_list_key(category_slug, page_number))
+
+
+def set_list_page(category_slug, page_number, body):
+    cache.set(_list_key(category_slug, page_number), body, BLOG_PAGE_CACHE_TIMEOUT)
+
+
+def get_detail_page(slug):
+    """ (page, clé) : page = {'pk', 'title', 'like_count', 'body'} ou None ; clé à passer à set_detail_page. """
+    key = _detail_key(slug)
+    return (cache.get(key) if key else None), key
+
+
+def set_detail_page(key, page):
+    if key:
+        cache.set(key, page, BLOG_PAGE_CACHE_TIMEOUT)
+
+
+def fill_slots(body, fragments):
+    """ Remplace les emplacements SLOT_* par les fragments rendus pour ce visiteur. """
+    for slot, html in fragments.items():
+        body = body.replace(slot, html)
+    return body
+
+
+def invalidate_article(*slugs):
+    """ Détail de l'article (slugs : ancien et nouveau après un renommage) + listes. """
+    Article.objects.filter(slug__in=slugs).update(page_version=F('page_version') + 1)
+    _bump_lists()
+
+
+def invalidate_categories():
+    Article.objects.update(page_version=F('page_version') + 1)
+    _bump_lists()
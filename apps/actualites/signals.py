@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core.images import ARTICLE_IMAGE_WIDTHS, derivatives_outdated, refresh_derivatives, refresh_in_background
+
+from .counters import add_comments
+from .models import Article, Category, Comment
+from .page_cache import invalidate_article, invalidate_categories
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        add_comments(instance.article_id, 1)
+        _invalidate_article_of(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Article):
+        return  # Suppression en cascade de l'article : ni compteur ni cache à mettre à jour
+    add_comments(instance.article_id, -1)
+    _invalidate_article_of(instance)
+
+
+def _invalidate_article_of(comment):
+    if Comment.article.is_cached(comment):
+        slug = comment.article.slug
+    else:
+        slug = Article.objects.filter(pk=comment.article_id).values_list('slug', flat=True).first()
+    if slug is not None:
+        transaction.on_commit(lambda: invalidate_article(slug))
+
+
+# Pages du blog en cache (page_cache.py) : création, modification, publication,
+# suppression d'un article ou d'une catégorie, depuis l'admin maison comme depuis /admin
+@receiver(pre_save, sender=Article)
+def remember_previous_slug(sender, instance, raw=False, **kwargs):
+    # Slug modifiable dans /admin : l'ancienne URL doit aussi sortir du cache
+    if instance.pk and not raw:
+        instance._previous_slug = Article.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_changed(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)} - {None}
+    transaction.on_commit(lambda: invalidate_article(*slugs))
+
+
+@receiver(post_save, sender=Article)
+def article_image_uploaded(sender, instance, **kwargs):
+    if derivatives_outdated(instance.image, instance.image_derivatives):
+        transaction.on_commit(lambda: refresh_in_background(refresh_article_image, instance.pk, instance.slug))
+
+
+def refresh_article_image(article_id, slug, force=False):
+    """ Déclinaisons de l'image (après l'envoi) ; les pages en cache passent au srcset. """
+    if refresh_derivatives(Article, article_id, 'image', 'image_derivatives', ARTICLE_IMAGE_WIDTHS, force):
+        invalidate_article(slug)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_categories)
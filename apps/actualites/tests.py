@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.query_inspector import QueryBudgetTestMixin
+
+from .counters import add_comments, reconcile_counters, set_like
+from .models import Article, Category, Comment
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """ Budget de requêtes de la liste du blog (settings.QUERY_BUDGETS), cache vide. """
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Conseils', slug='conseils')
+        author = User.objects.create(username='redaction', first_name='Awa')
+        reader = User.objects.create(username='lecteur')
+        for i in range(8):
+            article = Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', author=author, category=category,
+                excerpt='Extrait', content='Contenu', is_published=True,
+            )
+            Comment.objects.create(article=article, author=reader, content='Merci !')
+
+    def setUp(self):
+        cache.clear()  # Pages du blog en cache : on mesure la page "froide"
+
+    def test_list(self):
+        with self.assertQueryBudget(url_name='actualites:list'):
+            response = self.client.get(reverse('actualites:list'))
+        self.assertContains(response, 'Article 7')
+
+    def test_list_cached(self):
+        self.client.get(reverse('actualites:list'))
+        with self.assertQueryBudget(max_queries=2, url_name='actualites:list'):
+            self.client.get(reverse('actualites:list'))
+
+
+class PageCacheTests(TestCase):
+    """ Pages du blog en cache : versions en base, vues par tous les processus. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='redaction')
+        cls.article = Article.objects.create(
+            title='Rentrée', slug='rentree', author=cls.author,
+            excerpt='Extrait', content='Contenu', is_published=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_bumped_elsewhere_is_seen(self):
+        url = reverse('actualites:detail', args=['rentree'])
+        self.assertContains(self.client.get(url), 'Rentrée')
+        # Écriture faite par un autre processus : seul le compteur en base change ici
+        Article.objects.filter(pk=self.article.pk).update(title='Vacances', page_version=F('page_version') + 1)
+        self.assertContains(self.client.get(url), 'Vacances')
+
+    def test_reused_slug_does_not_serve_old_page(self):
+        url = reverse('actualites:detail', args=['rentree'])
+        self.client.get(url)
+        Article.objects.filter(pk=self.article.pk).update(slug='rentree-2024')
+        Article.objects.create(title='Nouvelle rentrée', slug='rentree', author=self.author,
+                               excerpt='Extrait', content='Contenu', is_published=True)
+        self.assertContains(self.client.get(url), 'Nouvelle rentrée')
+
+    def test_list_follows_new_article(self):
+        self.client.get(reverse('actualites:list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Examens', slug='examens', author=self.author,
+                                   excerpt='Extrait', content='Contenu', is_published=True)
+        self.assertContains(self.client.get(reverse('actualites:list')), 'Examens')
+
+
+class CounterTests(TestCase):
+    """ Compteurs dénormalisés des articles (counters.py). """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='redaction')
+        cls.article = Article.objects.create(
+            title='Rentrée', slug='rentree', author=cls.author, excerpt='Extrait', content='Contenu',
+        )
+
+    def _counts(self):
+        return Article.objects.values_list('like_count', 'comment_count').get(pk=self.article.pk)
+
+    def test_comment_count_follows_comments(self):
+        comment = Comment.objects.create(article=self.article, author=self.author, content='Merci')
+        Comment.objects.create(article=self.article, author=self.author, content='Bravo')
+        comment.delete()
+        self.assertEqual(self._counts(), (0, 1))
+
+    def test_counter_never_below_zero(self):
+        add_comments(self.article.pk, -3)  # Dérive (suppression en masse sans signal...)
+        self.assertEqual(self._counts(), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        Comment.objects.create(article=self.article, author=self.author, content='Merci')
+        Article.objects.filter(pk=self.article.pk).update(comment_count=7, like_count=2)
+        self.assertEqual(reconcile_counters(), 1)
+        self.assertEqual(self._counts(), (0, 1))
+        self.assertEqual(reconcile_counters(), 0)
+
+
+class LikeTests(TestCase):
+    """ Like idempotent : l'état voulu est envoyé, un double clic ne double ni ne défait rien. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='lecteur')
+        cls.article = Article.objects.create(
+            title='Rentrée', slug='rentree', author=cls.reader, excerpt='Extrait', content='Contenu',
+        )
+        cls.url = reverse('actualites:like_article', args=['rentree'])
+
+    def test_set_like_is_idempotent(self):
+        self.assertEqual(set_like(self.article.pk, self.reader.pk, True), (True, 1))
+        self.assertEqual(set_like(self.article.pk, self.reader.pk, True), (True, 1))
+        self.assertEqual(set_like(self.article.pk, self.reader.pk, False), (False, 0))
+        self.assertEqual(set_like(self.article.pk, self.reader.pk, False), (False, 0))
+        self.assertEqual(set_like(self.article.pk, self.reader.pk), (True, 1))  # Sans état : bascule
+
+    def test_double_click(self):
+        self.client.force_login(self.reader)
+        for _ in range(2):
+            response = self.client.post(self.url, {'liked': '1'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), {'liked': True, 'count': 1})
+        self.assertEqual(self.article.likes.count(), 1)
+
+    def test_expired_session_gets_401(self):
+        response = self.client.post(self.url, {'liked': '1'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('login_url', response.json())
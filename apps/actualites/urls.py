@@ -10,4 +10,5 @@ urlpatterns = [
     # NOUVEAU : Détail et Like
     path('article/<slug:slug>/', views.article_detail, name='detail'),
     path('article/<slug:slug>/like/', views.like_article, name='like_article'),
+    path('article/<slug:slug>/commentaires/', views.article_comments, name='comments'),
 ]
\ No newline at end of file
@@ -1,37 +1,95 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.db.models import Exists, OuterRef
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
-from .models import Article, Category
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import require_POST
+from apps.core.pagination import cursor_paginate
+from . import page_cache
+from .counters import set_like
+from .models import Article, Category, Comment
 from .forms import CommentForm
 
-# Vue Liste (Déjà existante, on ne change rien sauf l'import)
+COMMENTS_PER_PAGE = 20
+
+# Vue Liste : corps de page en cache partagé (page_cache.py), base.html rendu à chaque fois
 def list_articles(request, category_slug=None):
-    articles = Article.objects.filter(is_published=True).order_by('-created_at')
-    cat = None
-    if category_slug:
-        cat = get_object_or_404(Category, slug=category_slug)
-        articles = articles.filter(category=cat)
-    
-    paginator = Paginator(articles, 6)
-    page_obj = paginator.get_page(request.GET.get('page'))
-    
-    return render(request, 'actualites/list.html', {
-        'page_obj': page_obj,
-        'categories': Category.objects.all(),
-        'current_cat': cat
+    page_param = request.GET.get('page', '')
+    page_number = int(page_param) if page_param.isdigit() else 1
+    body = page_cache.get_list_page(category_slug, page_number)
+    if body is None:
+        # Auteur et catégorie joints, compteurs stockés : une seule requête par page
+        # (plus le COUNT du paginateur), quel que soit le nombre d'articles affichés
+        articles = (Article.objects.filter(is_published=True)
+                    .select_related('author', 'category')
+                    .defer('content')
+                    .order_by('-created_at'))
+        cat = None
+        if category_slug:
+            cat = get_object_or_404(Category, slug=category_slug)
+            articles = articles.filter(category=cat)
+
+        paginator = Paginator(articles, 6)
+        page_obj = paginator.get_page(page_number)
+
+        # Rendu sans la requête : rien de propre au visiteur ne doit entrer dans le cache
+        body = render_to_string('actualites/_list_body.html', {
+            'page_obj': page_obj,
+            'categories': Category.objects.all(),
+            'current_cat': cat
+        })
+        # Rangé sous le numéro de page réel (get_page ramène ?page=999 à la dernière) :
+        # une page hors limites ne crée pas d'entrée, le cache reste borné aux vraies pages
+        page_cache.set_list_page(category_slug, page_obj.number, body)
+
+    return render(request, 'actualites/list.html', {'page_body': mark_safe(body)})
+
+
+def _comment_page(article_id, cursor):
+    """ Page de commentaires (les plus récents d'abord), auteurs joints dans la même requête. """
+    comments = Comment.objects.select_related('author').only(
+        'content', 'created_at', 'article_id', 'author__first_name', 'author__last_name',
+    )
+    return cursor_paginate(comments, cursor, COMMENTS_PER_PAGE, filters={'article_id': article_id})
+
+
+def _more_comments_url(slug, page):
+    if not page.has_next:
+        return None
+    return f"{reverse('actualites:comments', args=[slug])}?cursor={page.next_cursor}"
+
+
+def _render_detail_page(slug):
+    article = get_object_or_404(Article.objects.select_related('author', 'category'), slug=slug)
+    # Première page seulement : le total affiché vient de article.comment_count
+    comments = _comment_page(article.pk, None)
+    body = render_to_string('actualites/_detail_body.html', {
+        'article': article,
+        'comments': comments,
+        'more_url': _more_comments_url(slug, comments),
+        'slot_like': mark_safe(page_cache.SLOT_LIKE),
+        'slot_comment_form': mark_safe(page_cache.SLOT_COMMENT_FORM),
     })
+    return {'pk': article.pk, 'title': article.title, 'like_count': article.like_count, 'body': body}
 
-# NOUVEAU : Vue Détail + Commentaires
+
+# Vue Détail + Commentaires : même HTML en cache pour tous, bouton like et formulaire rendus par visiteur
 def article_detail(request, slug):
-    article = get_object_or_404(Article, slug=slug)
-    comments = article.comments.all()
-    
-    # Vérifier si l'utilisateur a déjà liké
-    is_liked = False
+    page, cache_key = page_cache.get_detail_page(slug)
+    if page is None:
+        page = _render_detail_page(slug)
+        page_cache.set_detail_page(cache_key, page)
+
+    # État du like : seul le visiteur connecté coûte une requête (compteur à jour + a-t-il liké)
+    is_liked, total_likes = False, page['like_count']
     if request.user.is_authenticated:
-        if article.likes.filter(id=request.user.id).exists():
-            is_liked = True
+        liked = Article.likes.through.objects.filter(article_id=OuterRef('pk'), customuser_id=request.user.pk)
+        total_likes, is_liked = (Article.objects.filter(pk=page['pk'])
+                                 .annotate(is_liked=Exists(liked))
+                                 .values_list('like_count', 'is_liked').first() or (total_likes, False))
 
     # Gestion du formulaire de commentaire
     if request.method == 'POST':
@@ -41,28 +99,61 @@ def article_detail(request, slug):
         form = CommentForm(request.POST)
         if form.is_valid():
             comment = form.save(commit=False)
-            comment.article = article
+            comment.article_id = page['pk']
             comment.author = request.user
             comment.save()
             return redirect('actualites:detail', slug=slug)
     else:
         form = CommentForm()
 
-    context = {
-        'article': article,
-        'comments': comments,
-        'form': form,
-        'is_liked': is_liked,
-        'total_likes': article.total_likes()
+    fragments = {
+        page_cache.SLOT_LIKE: render_to_string('actualites/_like_button.html', {
+            'article': {'slug': slug}, 'is_liked': is_liked, 'total_likes': total_likes,
+        }, request=request),
+        page_cache.SLOT_COMMENT_FORM: render_to_string('actualites/_comment_form.html', {'form': form}, request=request),
     }
-    return render(request, 'actualites/detail.html', context)
+    return render(request, 'actualites/detail.html', {
+        'page_title': page['title'],
+        'page_body': mark_safe(page_cache.fill_slots(page['body'], fragments)),
+    })
 
-# NOUVEAU : Fonction Like
-@login_required
+def article_comments(request, slug):
+    """ Fragment HTML "Voir plus" : commentaires plus anciens que le curseur. """
+    article_id = Article.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    if article_id is None:
+        raise Http404
+    comments = _comment_page(article_id, request.GET.get('cursor'))
+    return render(request, 'actualites/_comments.html', {
+        'comments': comments,
+        'more_url': _more_comments_url(slug, comments),
+    })
+
+# Like / Unlike : une écriture conditionnelle, réponse JSON ou fragment (sans rendre la page)
+@require_POST
 def like_article(request, slug):
-    article = get_object_or_404(Article, slug=slug)
-    if article.likes.filter(id=request.user.id).exists():
-        article.likes.remove(request.user)
-    else:
-        article.likes.add(request.user)
-    return redirect('actualites:detail', slug=slug)
\ No newline at end of file
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if not request.user.is_authenticated:
+        # Session expirée : pas de redirection pour le JS (fetch la suivrait et
+        # afficherait la page de connexion à la place du bouton)
+        login = redirect_to_login(reverse('actualites:detail', args=[slug]))
+        if wants_json or is_ajax:
+            return JsonResponse({'login_url': login.url}, status=401)
+        return login
+
+    article_id = Article.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    if article_id is None:
+        raise Http404
+    # Le JS envoie l'état voulu (idempotent : un double clic ne défait pas le like) ;
+    # sans ce champ (formulaire sans JS), on bascule
+    wanted = request.POST.get('liked')
+    liked, like_count = set_like(article_id, request.user.pk, None if wanted not in ('0', '1') else wanted == '1')
+    state = {'liked': liked, 'count': like_count}
+
+    if wants_json:
+        return JsonResponse(state)
+    if is_ajax:
+        return render(request, 'actualites/_like_button.html', {
+            'article': {'slug': slug}, 'is_liked': liked, 'total_likes': like_count,
+        })
+    return redirect('actualites:detail', slug=slug)
@@ -1,18 +1,22 @@
-from .models import Message
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from .unread import unread_total
 
 def unread_count(request):
     """
     Ajoute la variable 'unread_messages_count' à tous les templates.
-    Compte les messages non lus où l'utilisateur est participant mais PAS l'expéditeur.
+    Lit le total de non lus de l'utilisateur en cache (communication/unread.py) :
+    la base n'est interrogée que si le cache est vide.
+    'realtime_enabled' : REALTIME_ENABLED et servi en ASGI, la page peut ouvrir le
+    WebSocket (REALTIME_WEBSOCKET_PATH) / flux SSE.
     """
     count = 0
     if request.user.is_authenticated:
-        # On cherche les messages dans les conversations du user
-        # Qui ne sont PAS envoyés par lui-même
-        # Et qui sont marqués comme non lus
-        count = Message.objects.filter(
-            thread__participants=request.user,
-            is_read=False
-        ).exclude(sender=request.user).count()
+        count = unread_total(request.user.pk)
     
-    return {'unread_messages_count': count}
\ No newline at end of file
+    return {
+        'unread_messages_count': count,
+        'realtime_enabled': settings.REALTIME_ENABLED and request.user.is_authenticated and isinstance(request, ASGIRequest),
+        'realtime_websocket_path': settings.REALTIME_WEBSOCKET_PATH,
+    }
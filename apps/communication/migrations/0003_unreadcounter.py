@@ -0,0 +1,49 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    # Messages is_read=False de chaque conversation, comptés pour chaque participant autre que l'expéditeur
+    Message = apps.get_model('communication', 'Message')
+    UnreadCounter = apps.get_model('communication', 'UnreadCounter')
+    rows = (Message.objects.filter(is_read=False)
+            .values_list('thread_id', 'thread__participants', 'sender_id')
+            .annotate(n=Count('id')).order_by())
+    counts = {}
+    for thread_id, user_id, sender_id, n in rows:
+        if user_id is not None and user_id != sender_id:
+            counts[(thread_id, user_id)] = counts.get((thread_id, user_id), 0) + n
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(thread_id=thread_id, user_id=user_id, count=n) for (thread_id, user_id), n in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0002_alter_message_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to='communication.thread')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Compteur de non lus',
+                'verbose_name_plural': 'Compteurs de non lus',
+                'unique_together': {('user', 'thread')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def _old_through(apps):
+    # Table automatique de l'ancien ManyToMany (thread_id, <user>_id)
+    Through = apps.get_model('communication', 'Thread').participants.through
+    user_field = next(f for f in Through._meta.fields if f.is_relation and f.name != 'thread')
+    return Through, user_field.attname
+
+
+def copy_participants(apps, schema_editor):
+    Through, user_attname = _old_through(apps)
+    ThreadParticipant = apps.get_model('communication', 'ThreadParticipant')
+    UnreadCounter = apps.get_model('communication', 'UnreadCounter')
+    counts = {(t, u): n for t, u, n in UnreadCounter.objects.values_list('thread_id', 'user_id', 'count')}
+    ThreadParticipant.objects.bulk_create(
+        [ThreadParticipant(thread_id=thread_id, user_id=user_id, unread_count=counts.get((thread_id, user_id), 0))
+         for thread_id, user_id in Through.objects.values_list('thread_id', user_attname)],
+        batch_size=1000,
+    )
+
+
+def uncopy_participants(apps, schema_editor):
+    Through, user_attname = _old_through(apps)
+    ThreadParticipant = apps.get_model('communication', 'ThreadParticipant')
+    UnreadCounter = apps.get_model('communication', 'UnreadCounter')
+    rows = list(ThreadParticipant.objects.values_list('thread_id', 'user_id', 'unread_count'))
+    Through.objects.bulk_create([Through(thread_id=t, **{user_attname: u}) for t, u, _ in rows], batch_size=1000)
+    UnreadCounter.objects.bulk_create([UnreadCounter(thread_id=t, user_id=u, count=n) for t, u, n in rows], batch_size=1000)
+
+
+def fill_last_message(apps, schema_editor):
+    Thread = apps.get_model('communication', 'Thread')
+    Message = apps.get_model('communication', 'Message')
+    latest = Message.objects.filter(thread=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+    Thread.objects.update(last_message_id=Subquery(latest))
+    for thread in Thread.objects.filter(last_message__isnull=False).select_related('last_message').iterator():
+        message = thread.last_message
+        Thread.objects.filter(pk=thread.pk).update(
+            last_message_snippet=message.content[:120],
+            last_message_sender_id=message.sender_id,
+            last_message_at=message.created_at,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0003_unreadcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThreadParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='communication.thread')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thread_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Participant',
+                'verbose_name_plural': 'Participants',
+                'unique_together': {('user', 'thread')},
+            },
+        ),
+        migrations.RunPython(copy_participants, uncopy_participants),
+        migrations.RemoveField(
+            model_name='thread',
+            name='participants',
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='participants',
+            field=models.ManyToManyField(related_name='threads', through='communication.ThreadParticipant', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.DeleteModel(
+            name='UnreadCounter',
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='communication.message'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_message_snippet',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_last_message, migrations.RunPython.noop),
+    ]
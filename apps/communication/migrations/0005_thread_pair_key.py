@@ -0,0 +1,69 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:59
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def merge_duplicate_threads(apps, schema_editor):
+    """
+    Renseigne pair_key des conversations à deux participants et fusionne les doublons
+    (même paire) dans la plus ancienne : messages, compteurs de non lus, dernier message.
+    """
+    Thread = apps.get_model('communication', 'Thread')
+    ThreadParticipant = apps.get_model('communication', 'ThreadParticipant')
+    Message = apps.get_model('communication', 'Message')
+
+    members = {}
+    for thread_id, user_id in ThreadParticipant.objects.values_list('thread_id', 'user_id'):
+        members.setdefault(thread_id, set()).add(user_id)
+    by_pair = {}
+    for thread_id, user_ids in members.items():
+        if len(user_ids) == 2:
+            low, high = sorted(user_ids)
+            by_pair.setdefault(f"{low}:{high}", []).append(thread_id)
+
+    for key, thread_ids in by_pair.items():
+        keep, *duplicates = sorted(thread_ids)
+        if duplicates:
+            Message.objects.filter(thread_id__in=duplicates).update(thread_id=keep)
+            for membership in ThreadParticipant.objects.filter(thread_id=keep):
+                merged = ThreadParticipant.objects.filter(thread_id__in=duplicates, user_id=membership.user_id)
+                membership.unread_count += sum(merged.values_list('unread_count', flat=True))
+                last_read = [at for at in merged.values_list('last_read_at', flat=True) if at]
+                if membership.last_read_at:
+                    last_read.append(membership.last_read_at)
+                membership.last_read_at = max(last_read, default=None)
+                membership.save(update_fields=['unread_count', 'last_read_at'])
+            updated_at = Thread.objects.filter(pk__in=thread_ids).aggregate(at=Max('updated_at'))['at']
+            Thread.objects.filter(pk__in=duplicates).delete()
+
+            last = Message.objects.filter(thread_id=keep).order_by('-created_at', '-id').first()
+            Thread.objects.filter(pk=keep).update(
+                updated_at=updated_at,
+                last_message=last,
+                last_message_snippet=last.content[:120] if last else '',
+                last_message_sender_id=last.sender_id if last else None,
+                last_message_at=last.created_at if last else None,
+            )
+        Thread.objects.filter(pk=keep).update(pair_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0004_threadparticipant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='pair_key',
+            field=models.CharField(blank=True, editable=False, max_length=41, null=True),
+        ),
+        migrations.RunPython(merge_duplicate_threads, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='thread',
+            name='pair_key',
+            field=models.CharField(blank=True, editable=False, max_length=41, null=True, unique=True),
+        ),
+    ]
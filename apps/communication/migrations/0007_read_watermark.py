@@ -0,0 +1,49 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:01
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def fill_watermarks(apps, schema_editor):
+    """
+    Filigrane de chaque participant = dernier message qu'il a lu (message reçu is_read=True)
+    ou envoyé lui-même. Le compteur de non lus est recalculé à partir de ce filigrane.
+    """
+    ThreadParticipant = apps.get_model('communication', 'ThreadParticipant')
+    Message = apps.get_model('communication', 'Message')
+    for membership in ThreadParticipant.objects.iterator():
+        messages = Message.objects.filter(thread_id=membership.thread_id)
+        watermark = messages.filter(
+            Q(sender_id=membership.user_id) | Q(is_read=True)
+        ).aggregate(last=Max('id'))['last'] or 0
+        unread = (messages.filter(id__gt=watermark).exclude(sender_id=membership.user_id)
+                  .aggregate(n=Count('id'))['n'])
+        ThreadParticipant.objects.filter(pk=membership.pk).update(last_read_message_id=watermark, unread_count=unread)
+
+
+def restore_is_read(apps, schema_editor):
+    ThreadParticipant = apps.get_model('communication', 'ThreadParticipant')
+    Message = apps.get_model('communication', 'Message')
+    for thread_id, user_id, watermark in ThreadParticipant.objects.values_list('thread_id', 'user_id', 'last_read_message_id'):
+        (Message.objects.filter(thread_id=thread_id, id__lte=watermark)
+         .exclude(sender_id=user_id).update(is_read=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0006_message_thread_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threadparticipant',
+            name='last_read_message_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_watermarks, restore_is_read),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from apps.core.fulltext import get_backend
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Table FTS5 (SQLite) ou tsvector + GIN (PostgreSQL), puis indexation des messages existants
+    backend = get_backend(schema_editor.connection)
+    backend.create_index('messages')
+
+    Message = apps.get_model('communication', 'Message')
+    for pk, content in Message.objects.values_list('pk', 'content').iterator():
+        backend.update('messages', pk, '', content)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    get_backend(schema_editor.connection).drop_index('messages')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0007_read_watermark'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -1,23 +1,89 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
+SNIPPET_LENGTH = 120
+
 class Thread(models.Model):
-    participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='threads')
+    participants = models.ManyToManyField(settings.AUTH_USER_MODEL, through='ThreadParticipant', related_name='threads')
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # "petit_id:grand_id" des deux participants : une seule conversation par paire d'utilisateurs
+    pair_key = models.CharField(max_length=41, unique=True, null=True, blank=True, editable=False)
+
+    # --- DERNIER MESSAGE (dénormalisé pour la messagerie, sans charger les messages) ---
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_snippet = models.CharField(max_length=SNIPPET_LENGTH, blank=True)
+    last_message_sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-updated_at']
 
+    @staticmethod
+    def make_pair_key(user_id, other_id):
+        low, high = sorted((user_id, other_id))
+        return f"{low}:{high}"
+
+    @classmethod
+    def get_or_create_for_pair(cls, user, other):
+        """
+        Conversation entre deux utilisateurs : une lecture sur l'index unique de pair_key,
+        création atomique sinon (deux clics simultanés ne créent pas de doublon).
+        """
+        key = cls.make_pair_key(user.pk, other.pk)
+        thread = cls.objects.filter(pair_key=key).first()
+        if thread is not None:
+            return thread, False
+        with transaction.atomic():
+            thread, created = cls.objects.get_or_create(pair_key=key)
+            if created:
+                thread.participants.add(user, other)
+        return thread, created
+
     def get_other_participant(self, user):
         return self.participants.exclude(id=user.id).first()
 
+    def record_message(self, message):
+        """ Met à jour le dernier message (une seule requête UPDATE, sans toucher au reste de la ligne). """
+        Thread.objects.filter(pk=self.pk).update(
+            last_message=message,
+            last_message_snippet=message.content[:SNIPPET_LENGTH],
+            last_message_sender_id=message.sender_id,
+            last_message_at=message.created_at,
+            updated_at=message.created_at,
+        )
+
+class ThreadParticipant(models.Model):
+    """
+    Participation d'un utilisateur à une conversation, avec son état de lecture :
+    - last_read_message_id : filigrane, id du dernier message lu (tous ceux d'avant le sont aussi) ;
+    - unread_count : incrémenté à l'envoi d'un message, remis à zéro quand le filigrane avance
+      (cf. communication/unread.py).
+    """
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='thread_memberships')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message_id = models.BigIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'thread')
+        verbose_name = "Participant"
+        verbose_name_plural = "Participants"
+
+    def __str__(self):
+        return f"{self.user_id} dans {self.thread_id} ({self.unread_count} non lu(s))"
+
 class Message(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sent_messages')
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['created_at']
\ No newline at end of file
+        ordering = ['created_at']
+        indexes = [
+            # Fenêtre des derniers messages d'une conversation (curseur (created_at, id) à rebours)
+            models.Index(fields=['thread', '-created_at', '-id'], name='message_thread_created_idx'),
+        ]
@@ -0,0 +1,169 @@
+"""
+Pub/sub de la messagerie temps réel : des canaux ("user:<id>") sur lesquels on publie
+des événements JSON, et des abonnés asyncio (connexions WebSocket / SSE ouvertes).
+
+Deux implémentations, choisies par settings.REALTIME_HUB :
+- InMemoryHub : un seul processus (runserver, un worker ASGI). Rien ne passe par la base.
+- SocketHub : plusieurs workers sur la même machine. Chaque processus qui a des abonnés
+  écoute sur sa propre socket Unix (datagrammes) dans REALTIME_SOCKET_DIR ; publier,
+  c'est envoyer un datagramme à chaque socket du dossier. Pas de broker à faire tourner,
+  pas de polling : le noyau réveille le worker concerné.
+
+publish() peut être appelé depuis du code synchrone (signal, vue WSGI, autre thread).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('polynova.realtime')
+
+SUBSCRIBER_QUEUE_SIZE = 100
+MAX_DATAGRAM_SIZE = 64 * 1024
+
+
+class Subscription:
+    """ File d'événements d'un abonné (une connexion). """
+
+    def __init__(self, hub, channel):
+        self.hub = hub
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event):
+        """ Appelé dans la boucle de l'abonné. Un abonné trop lent perd les plus vieux événements. """
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class InMemoryHub:
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """ À appeler depuis la boucle asyncio qui consommera les événements. """
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            members = self.subscribers.get(subscription.channel)
+            if members is not None:
+                members.discard(subscription)
+                if not members:
+                    del self.subscribers[subscription.channel]
+
+    def publish(self, channel, event):
+        self.dispatch(channel, event)
+
+    def dispatch(self, channel, event):
+        """ Remet l'événement aux abonnés locaux du canal, quel que soit le thread appelant. """
+        with self.lock:
+            members = list(self.subscribers.get(channel, ()))
+        for subscription in members:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Boucle fermée (connexion terminée pendant l'arrêt du serveur)
+                self.unsubscribe(subscription)
+
+
+class SocketHub(InMemoryHub):
+    def __init__(self, directory=None):
+        super().__init__()
+        self.directory = directory or settings.REALTIME_SOCKET_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sender.setblocking(False)
+        self.receiver = None
+        self.path = None
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        with self.lock:
+            if self.receiver is None:
+                self._listen(subscription.loop)
+        return subscription
+
+    def _listen(self, loop):
+        """ Socket de réception de ce processus, lue par la boucle asyncio sans thread ni polling. """
+        self.path = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+        self.receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.receiver.bind(self.path)
+        self.receiver.setblocking(False)
+        loop.add_reader(self.receiver.fileno(), self._receive)
+
+    def _receive(self):
+        while True:
+            try:
+                data = self.receiver.recv(MAX_DATAGRAM_SIZE)
+            except BlockingIOError:
+                return
+            try:
+                packet = json.loads(data)
+                self.dispatch(packet['channel'], packet['event'])
+            except (ValueError, KeyError):
+                logger.warning("Datagramme temps réel invalide ignoré")
+
+    def publish(self, channel, event):
+        data = json.dumps({'channel': channel, 'event': event}).encode()
+        if len(data) > MAX_DATAGRAM_SIZE:
+            logger.warning("Événement temps réel trop gros ignoré (%s octets)", len(data))
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith('.sock'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                self.sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker arrêté sans nettoyer sa socket
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                logger.warning("File de réception pleine pour %s, événement perdu", name)
+
+    def close(self):
+        if self.receiver is not None:
+            self.receiver.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """ Hub du processus, construit à la première utilisation d'après settings.REALTIME_HUB. """
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = import_string(settings.REALTIME_HUB)()
+    return _hub
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
@@ -0,0 +1,142 @@
+"""
+Messagerie temps réel (ASGI).
+
+Événements poussés sur le canal de chaque utilisateur (cf. pubsub.py) :
+- {"type": "message", ...} : nouveau message dans une de ses conversations ;
+- {"type": "unread", "count": n} : nouveau total de non lus (badge du menu).
+
+Deux transports, servis uniquement par un serveur ASGI (config/asgi.py) :
+- WebSocket sur REALTIME_WEBSOCKET_PATH (application ASGI brute, sans dépendance) ;
+- Server-Sent Events sur la vue message_stream, en secours si le WebSocket échoue.
+Sous WSGI (gunicorn classique), la page fonctionne comme avant, sans mise à jour en direct.
+settings.REALTIME_ENABLED (faux par défaut) : sans lui, rien n'est publié ni proposé aux pages.
+"""
+import asyncio
+import json
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseForbidden, StreamingHttpResponse
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from django.utils import timezone
+from django.utils.formats import date_format
+
+from .pubsub import get_hub, user_channel
+from .unread import unread_total
+
+SSE_KEEPALIVE_SECONDS = 25
+
+
+# --- Publication (code synchrone, après commit) ---
+
+def publish_message(message, recipient_ids):
+    event = {
+        'type': 'message',
+        'thread': message.thread_id,
+        'id': message.pk,
+        'sender': message.sender_id,
+        'content': message.content,
+        'time': date_format(timezone.localtime(message.created_at), 'H:i'),
+    }
+    hub = get_hub()
+    for user_id in recipient_ids:
+        hub.publish(user_channel(user_id), event)
+
+
+def publish_unread(*user_ids):
+    if not settings.REALTIME_ENABLED:
+        return  # Personne n'écoute : pas de calcul de total pour rien
+    hub = get_hub()
+    for user_id in user_ids:
+        hub.publish(user_channel(user_id), {'type': 'unread', 'count': unread_total(user_id)})
+
+
+# --- Authentification d'une connexion ASGI brute (cookie de session) ---
+
+def _user_id_from_cookies(cookies):
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    user = get_user(SimpleNamespace(session=session))
+    return user.pk if user.is_authenticated else None
+
+
+def _parse_cookies(headers):
+    for name, value in headers:
+        if name == b'cookie':
+            return parse_cookie(value.decode('latin-1'))
+    return {}
+
+
+def _origin_allowed(headers):
+    """ Protection contre le détournement de WebSocket depuis un autre site. """
+    for name, value in headers:
+        if name == b'origin':
+            host = value.decode('latin-1').split('://', 1)[-1]
+            domain, _ = split_domain_port(host)
+            return bool(domain) and validate_host(domain, settings.ALLOWED_HOSTS)
+    return True  # Pas de navigateur, pas d'en-tête Origin
+
+
+async def websocket_app(scope, receive, send):
+    """ Application ASGI du WebSocket : n'envoie que des événements, ignore ce que le client écrit. """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    headers = scope.get('headers', [])
+    user_id = None
+    if _origin_allowed(headers):
+        user_id = await sync_to_async(_user_id_from_cookies)(_parse_cookies(headers))
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+    await send({'type': 'websocket.accept'})
+
+    subscription = get_hub().subscribe(user_channel(user_id))
+    incoming = asyncio.ensure_future(receive())
+    try:
+        while True:
+            outgoing = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED)
+            if outgoing in done:
+                await send({'type': 'websocket.send', 'text': json.dumps(outgoing.result())})
+            else:
+                outgoing.cancel()
+            if incoming in done:
+                if incoming.result()['type'] == 'websocket.disconnect':
+                    break
+                incoming = asyncio.ensure_future(receive())
+    finally:
+        incoming.cancel()
+        subscription.close()
+
+
+async def message_stream(request):
+    """ Flux Server-Sent Events de l'utilisateur connecté (secours du WebSocket). """
+    if not settings.REALTIME_ENABLED or not isinstance(request, ASGIRequest):
+        raise Http404  # Sous WSGI le flux bloquerait un worker pour toute la durée de la connexion
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+
+    async def events():
+        subscription = get_hub().subscribe(user_channel(user.pk))
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
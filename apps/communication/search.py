@@ -0,0 +1,44 @@
+"""
+Recherche dans les messages d'un utilisateur (toutes ses conversations).
+
+Index plein texte 'messages' (apps.core.fulltext : FTS5 sous SQLite, tsvector sous PostgreSQL),
+tenu à jour message par message par les signaux de Message. La restriction aux conversations
+de l'utilisateur est appliquée DANS la requête plein texte, pas après coup.
+"""
+from apps.core.fulltext import get_backend, highlight
+from apps.core.pagination import encode_cursor
+
+from .models import Message
+
+MESSAGE_FTS_INDEX = 'messages'
+MESSAGE_SEARCH_LIMIT = 50
+
+
+def index_message(message):
+    get_backend().update(MESSAGE_FTS_INDEX, message.pk, '', message.content)
+
+
+def unindex_message(message_id):
+    get_backend().delete(MESSAGE_FTS_INDEX, message_id)
+
+
+def search_messages(user, query, limit=MESSAGE_SEARCH_LIMIT):
+    """
+    Messages des conversations de `user` qui contiennent tous les mots de `query`,
+    du plus pertinent au moins pertinent, avec extrait surligné et curseur de position.
+    """
+    within = Message.objects.filter(thread__memberships__user=user).values('pk')
+    ids = get_backend().search(MESSAGE_FTS_INDEX, query, limit, within=within)
+    messages = Message.objects.select_related('sender').in_bulk(ids)
+    results = []
+    for pk in ids:
+        message = messages.get(pk)
+        if message is None:
+            continue
+        results.append({
+            'message': message,
+            'snippet': highlight(message.content, query),
+            # Fenêtre de thread_detail qui se termine sur ce message (curseur exclusif juste après lui)
+            'cursor': encode_cursor(message.created_at, message.pk + 1),
+        })
+    return results
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Message, Thread, ThreadParticipant
+from .realtime import publish_message, publish_unread
+from .search import index_message, unindex_message
+from .unread import message_removed, message_sent
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    if created:
+        instance.thread.record_message(instance)
+        message_sent(instance)
+        if settings.REALTIME_ENABLED:
+            transaction.on_commit(lambda: _push_message(instance))
+    index_message(instance)
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, origin=None, **kwargs):
+    unindex_message(instance.pk)
+    if not isinstance(origin, Thread):  # Conversation supprimée : participations supprimées aussi
+        message_removed(instance)
+
+
+def _push_message(message):
+    # Après l'invalidation des totaux (on_commit de message_sent, enregistré avant)
+    participant_ids = list(
+        ThreadParticipant.objects.filter(thread_id=message.thread_id).values_list('user_id', flat=True)
+    )
+    publish_message(message, participant_ids)
+    publish_unread(*[user_id for user_id in participant_ids if user_id != message.sender_id])
@@ -1,3 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Message, Thread, ThreadParticipant
+from .unread import mark_thread_read, unread_total
+
+User = get_user_model()
+
+
+class MessagingTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = User.objects.create(username='parent', role='parent')
+        cls.tutor = User.objects.create(username='prof', role='tutor')
+
+    def setUp(self):
+        cache.clear()
+
+    def _send(self, thread, sender, content='Bonjour'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(thread=thread, sender=sender, content=content)
+
+    def _membership(self, thread, user):
+        return ThreadParticipant.objects.select_related('thread').get(thread=thread, user=user)
+
+
+class UnreadCounterTests(MessagingTestCase):
+    """ Compteurs de non-lus par participation et total par utilisateur en cache (unread.py). """
+
+    def test_counters_follow_messages(self):
+        thread, _ = Thread.get_or_create_for_pair(self.parent, self.tutor)
+        self._send(thread, self.parent)
+        second = self._send(thread, self.parent)
+        self.assertEqual(self._membership(thread, self.tutor).unread_count, 2)
+        self.assertEqual(self._membership(thread, self.parent).unread_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self._membership(thread, self.tutor).unread_count, 1)
+
+    def test_cached_total_invalidated_on_send(self):
+        thread, _ = Thread.get_or_create_for_pair(self.parent, self.tutor)
+        other, _ = Thread.get_or_create_for_pair(User.objects.create(username='parent2'), self.tutor)
+        self._send(thread, self.parent)
+        self.assertEqual(unread_total(self.tutor.pk), 1)
+        with self.assertNumQueries(0):
+            unread_total(self.tutor.pk)  # Total en cache
+
+        self._send(other, other.participants.exclude(pk=self.tutor.pk).get())
+        self.assertEqual(unread_total(self.tutor.pk), 2)
+
+
+class PairKeyTests(MessagingTestCase):
+    """ Une seule conversation par paire d'utilisateurs (Thread.pair_key). """
+
+    def test_same_thread_both_ways(self):
+        thread, created = Thread.get_or_create_for_pair(self.parent, self.tutor)
+        again, created_again = Thread.get_or_create_for_pair(self.tutor, self.parent)
+        self.assertEqual((again.pk, created, created_again), (thread.pk, True, False))
+        self.assertEqual(set(thread.participants.values_list('pk', flat=True)), {self.parent.pk, self.tutor.pk})
+
+    def test_start_thread_reuses_conversation(self):
+        self.client.force_login(self.parent)
+        first = self.client.get(reverse('start_thread', args=[self.tutor.pk]))
+        self.client.force_login(self.tutor)
+        second = self.client.get(reverse('start_thread', args=[self.parent.pk]))
+        self.assertEqual(first.url, second.url)
+        self.assertEqual(Thread.objects.count(), 1)
+
+    def test_pair_key_is_unique(self):
+        Thread.get_or_create_for_pair(self.parent, self.tutor)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Thread.objects.create(pair_key=Thread.make_pair_key(self.tutor.pk, self.parent.pk))
+
+
+class ReadWatermarkTests(MessagingTestCase):
+    """ Filigrane de lecture (last_read_message_id) et remise à zéro de unread_count. """
+
+    def setUp(self):
+        super().setUp()
+        self.thread, _ = Thread.get_or_create_for_pair(self.parent, self.tutor)
+
+    def test_sender_reads_own_message(self):
+        message = self._send(self.thread, self.parent)
+        self.assertEqual(self._membership(self.thread, self.parent).last_read_message_id, message.pk)
+
+    def test_opening_thread_advances_watermark(self):
+        self._send(self.thread, self.parent)
+        last = self._send(self.thread, self.parent)
+        self.assertEqual(unread_total(self.tutor.pk), 2)
+
+        membership = self._membership(self.thread, self.tutor)
+        self.assertTrue(mark_thread_read(membership))
+        membership = self._membership(self.thread, self.tutor)
+        self.assertEqual((membership.last_read_message_id, membership.unread_count), (last.pk, 0))
+        self.assertEqual(unread_total(self.tutor.pk), 0)
+        with self.assertNumQueries(0):
+            self.assertFalse(mark_thread_read(membership))  # Tout est lu : aucune écriture
+
+    def test_message_arriving_while_reading_is_not_lost(self):
+        self._send(self.thread, self.parent)
+        membership = self._membership(self.thread, self.tutor)  # Conversation chargée...
+        last = self._send(self.thread, self.parent)              # ... puis un message arrive
+        self.assertTrue(mark_thread_read(membership))
+        membership = self._membership(self.thread, self.tutor)
+        self.assertEqual((membership.last_read_message_id, membership.unread_count), (last.pk, 0))
+
+    def test_thread_page_marks_read(self):
+        self._send(self.thread, self.parent)
+        self.client.force_login(self.tutor)
+        self.client.get(reverse('thread_detail', args=[self.thread.pk]))
+        self.assertEqual(self._membership(self.thread, self.tutor).unread_count, 0)
+        self.assertEqual(unread_total(self.tutor.pk), 0)
@@ -0,0 +1,101 @@
+"""
+État de lecture des conversations.
+
+- ThreadParticipant.last_read_message_id : filigrane de lecture. Ouvrir une conversation
+  ne fait qu'avancer ce filigrane jusqu'au dernier message (une ligne, et seulement s'il avance).
+- ThreadParticipant.unread_count : messages reçus au-delà du filigrane, incrémenté à l'envoi
+  (signal post_save de Message), remis à zéro quand le filigrane avance, décrémenté si un
+  message non lu est supprimé. C'est LA source pour l'affichage (badge, messagerie) :
+  le filigrane n'est remis à zéro avec lui que s'il atteint le dernier message de la
+  conversation (UPDATE conditionné), un message arrivé entre-temps reste donc compté.
+- Total par utilisateur : entier en cache (clé unread_count:<user_id>), supprimé dès que
+  l'un de ses compteurs bouge ; en cas d'absence, une seule somme sur ses compteurs.
+  La suppression n'atteint que le cache du processus qui écrit : avec LocMem (un cache
+  par worker), l'entrée ne vit que quelques secondes, sinon les badges et les ETag des
+  autres workers resteraient faux jusqu'à l'expiration. Une heure avec un cache partagé.
+"""
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Thread, ThreadParticipant
+
+UNREAD_CACHE_TIMEOUT = 60 * 60
+MARK_READ_ATTEMPTS = 3
+UNREAD_LOCAL_CACHE_TIMEOUT = 5  # Cache propre au processus : absorbe juste les rafales de pages
+
+
+def _timeout():
+    return UNREAD_LOCAL_CACHE_TIMEOUT if isinstance(cache, LocMemCache) else UNREAD_CACHE_TIMEOUT
+
+
+def _cache_key(user_id):
+    return f'unread_count:{user_id}'
+
+
+def invalidate_unread_total(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def unread_total(user_id):
+    """ Nombre total de messages non lus de l'utilisateur (cache, sinon base). """
+    total = cache.get(_cache_key(user_id))
+    if total is None:
+        total = (ThreadParticipant.objects.filter(user_id=user_id)
+                 .aggregate(total=Sum('unread_count'))['total'] or 0)
+        cache.set(_cache_key(user_id), total, _timeout())
+    return total
+
+
+def message_sent(message):
+    """
+    +1 pour chaque participant de la conversation autre que l'expéditeur ;
+    l'expéditeur, lui, a forcément lu jusqu'à son propre message.
+    """
+    memberships = ThreadParticipant.objects.filter(thread_id=message.thread_id)
+    recipients = memberships.exclude(user_id=message.sender_id)
+    with transaction.atomic():
+        recipient_ids = list(recipients.values_list('user_id', flat=True))
+        recipients.update(unread_count=F('unread_count') + 1)
+        sender_read = _advance_watermark(memberships.filter(user_id=message.sender_id), message.pk)
+        changed = recipient_ids + ([message.sender_id] if sender_read else [])
+        transaction.on_commit(lambda: invalidate_unread_total(*changed))
+
+
+def message_removed(message):
+    """ Message supprimé : il ne compte plus pour ceux qui ne l'avaient pas encore lu. """
+    unread = (ThreadParticipant.objects
+              .filter(thread_id=message.thread_id, last_read_message_id__lt=message.pk, unread_count__gt=0)
+              .exclude(user_id=message.sender_id))
+    with transaction.atomic():
+        user_ids = list(unread.values_list('user_id', flat=True))
+        unread.update(unread_count=F('unread_count') - 1)
+        transaction.on_commit(lambda: invalidate_unread_total(*user_ids))
+
+
+def _advance_watermark(memberships, message_id):
+    # Seulement si message_id est toujours le dernier message : sinon le suivant,
+    # déjà compté dans unread_count, serait effacé du compteur sans être lu
+    return (memberships.filter(last_read_message_id__lt=message_id, thread__last_message_id=message_id)
+            .update(last_read_message_id=message_id, unread_count=0, last_read_at=timezone.now()))
+
+
+def mark_thread_read(membership):
+    """
+    Le participant a ouvert la conversation (membership.thread chargé) : filigrane avancé
+    jusqu'au dernier message. Aucune requête si tout était déjà lu, sinon un UPDATE d'une ligne
+    (relu et retenté si un message est arrivé entre-temps).
+    Retourne True si le filigrane a avancé (membership.last_read_message_id mis à jour).
+    """
+    last_message_id = membership.thread.last_message_id
+    for _ in range(MARK_READ_ATTEMPTS):
+        if last_message_id is None or last_message_id <= membership.last_read_message_id:
+            return False
+        if _advance_watermark(ThreadParticipant.objects.filter(pk=membership.pk), last_message_id):
+            membership.last_read_message_id = last_message_id
+            invalidate_unread_total(membership.user_id)
+            return True
+        last_message_id = Thread.objects.filter(pk=membership.thread_id).values_list('last_message_id', flat=True).first()
+    return False
@@ -1,8 +1,12 @@
 from django.urls import path
-from . import views
+from . import realtime, views
 
 urlpatterns = [
     path('nouveau/<int:user_id>/', views.start_thread, name='start_thread'),
     path('messagerie/', views.inbox, name='inbox'),
+    path('messagerie/recherche/', views.message_search, name='message_search'),
     path('messagerie/<int:pk>/', views.thread_detail, name='thread_detail'),
+    path('messagerie/<int:pk>/historique/', views.thread_history, name='thread_history'),
+    path('messagerie/<int:pk>/lu/', views.thread_mark_read, name='thread_mark_read'),
+    path('messagerie/flux/', realtime.message_stream, name='message_stream'),
 ]
\ No newline at end of file
@@ -1,43 +1,96 @@
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_POST
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from .models import Thread, Message
+from django.db.models import Count, Max, Sum
+from apps.core.conditional import not_modified, page_etag, set_validators
+from apps.core.pagination import cursor_paginate
+from .models import Thread, ThreadParticipant
 from .forms import MessageForm
+from .realtime import publish_unread
+from .search import search_messages
+from .unread import mark_thread_read, unread_total
 
 User = get_user_model()
 
+MESSAGES_PER_PAGE = 30
+
 @login_required
 def start_thread(request, user_id):
     target_user = get_object_or_404(User, pk=user_id)
     if request.user == target_user: return redirect('dashboard')
 
-    threads = Thread.objects.filter(participants=request.user).filter(participants=target_user)
-    if threads.exists():
-        thread = threads.first()
-    else:
-        thread = Thread.objects.create()
-        thread.participants.add(request.user, target_user)
-    
+    thread, _ = Thread.get_or_create_for_pair(request.user, target_user)
     return redirect('thread_detail', pk=thread.pk)
 
 @login_required
 def inbox(request):
-    threads = request.user.threads.all().prefetch_related('participants', 'messages')
-    threads_data = []
-    for thread in threads:
-        other_user = thread.get_other_participant(request.user)
-        last_msg = thread.messages.last()
-        threads_data.append({'thread': thread, 'other': other_user, 'last_msg': last_msg})
-    return render(request, 'communication/inbox.html', {'threads_data': threads_data})
+    # Validateur : un seul agrégat sur mes participations (dernière activité, lectures, non lus)
+    state = ThreadParticipant.objects.filter(user=request.user).aggregate(
+        updated_at=Max('thread__updated_at'), threads=Count('id'),
+        unread=Sum('unread_count'), read=Sum('last_read_message_id'),
+    )
+    etag = page_etag(request, 'inbox', *state.values(), unread_total(request.user.pk))
+    cached = not_modified(request, etag, state['updated_at'])
+    if cached is not None:
+        return cached
+
+    # 2 requêtes quel que soit le nombre de conversations : mes participations (+ conversation),
+    # puis les autres participants. Aperçu du dernier message dénormalisé sur Thread.
+    memberships = list(
+        ThreadParticipant.objects.filter(user=request.user)
+        .select_related('thread')
+        .order_by('-thread__updated_at')
+    )
+    others = {
+        membership.thread_id: membership.user
+        for membership in ThreadParticipant.objects
+        .filter(thread_id__in=[m.thread_id for m in memberships])
+        .exclude(user=request.user)
+        .select_related('user')
+    }
+    threads_data = [
+        {'thread': m.thread, 'other': others.get(m.thread_id), 'unread': m.unread_count}
+        for m in memberships
+    ]
+    response = render(request, 'communication/inbox.html', {'threads_data': threads_data})
+    return set_validators(response, etag, state['updated_at'])
+
+def _membership_for(request, pk):
+    """ Participation de l'utilisateur à la conversation, avec la conversation (une requête), sinon None. """
+    return (ThreadParticipant.objects.filter(thread_id=pk, user=request.user)
+            .select_related('thread').first())
+
+def _message_page(request, thread):
+    """ Fenêtre des MESSAGES_PER_PAGE messages qui précèdent le curseur (les plus récents par défaut). """
+    page = cursor_paginate(thread.messages.all(), request.GET.get('before'), MESSAGES_PER_PAGE)
+    older_url = None
+    if page.has_next:
+        older_url = f"{reverse('thread_history', args=[thread.pk])}?before={page.next_cursor}"
+    # Le curseur lit du plus récent au plus ancien ; on affiche dans l'ordre chronologique
+    return {'messages_list': page.items[::-1], 'older_url': older_url}
 
 @login_required
 def thread_detail(request, pk):
-    thread = get_object_or_404(Thread, pk=pk)
-    if request.user not in thread.participants.all():
+    membership = _membership_for(request, pk)
+    if membership is None:
         return redirect('inbox')
+    thread = membership.thread
+
+    if mark_thread_read(membership):
+        publish_unread(request.user.pk)  # Badge des autres onglets ouverts
 
-    thread.messages.exclude(sender=request.user).update(is_read=True)
+    # Validateur calculé après la lecture : c'est l'état que la page va afficher
+    etag = page_etag(
+        request, request.get_full_path(), thread.updated_at, thread.last_message_id,
+        membership.last_read_message_id, unread_total(request.user.pk),
+    )
+    cached = not_modified(request, etag, thread.updated_at)
+    if cached is not None:
+        return cached
 
     if request.method == 'POST':
         form = MessageForm(request.POST)
@@ -45,15 +98,52 @@ def thread_detail(request, pk):
             msg = form.save(commit=False)
             msg.thread = thread
             msg.sender = request.user
-            msg.save()
-            thread.save() 
+            msg.save()  # Dernier message et updated_at de la conversation : cf. Thread.record_message
             return redirect('thread_detail', pk=pk)
     else:
         form = MessageForm()
 
-    return render(request, 'communication/thread_detail.html', {
+    response = render(request, 'communication/thread_detail.html', {
         'thread': thread,
-        'messages_list': thread.messages.all(),
         'form': form,
-        'other_user': thread.get_other_participant(request.user)
-    })
\ No newline at end of file
+        'other_user': thread.get_other_participant(request.user),
+        **_message_page(request, thread),
+    })
+    if form.is_bound:
+        return response  # Formulaire invalide réaffiché : rien à mettre en cache
+    return set_validators(response, etag, thread.updated_at)
+
+@login_required
+def thread_history(request, pk):
+    """ Fragment HTML des messages plus anciens (bouton "Messages précédents"). """
+    membership = _membership_for(request, pk)
+    if membership is None:
+        raise Http404
+    return render(request, 'communication/_messages.html', _message_page(request, membership.thread))
+
+@login_required
+@require_POST
+def thread_mark_read(request, pk):
+    """ Message reçu en direct pendant que la conversation est affichée : il est lu. """
+    membership = _membership_for(request, pk)
+    if membership is None:
+        raise Http404
+    if mark_thread_read(membership):
+        publish_unread(request.user.pk)
+    return HttpResponse(status=204)
+
+@login_required
+def message_search(request):
+    """ Recherche dans tous les messages de mes conversations (index plein texte). """
+    query = request.GET.get('q', '').strip()
+    results = search_messages(request.user, query) if query else []
+    others = {
+        membership.thread_id: membership.user
+        for membership in ThreadParticipant.objects
+        .filter(thread_id__in={r['message'].thread_id for r in results})
+        .exclude(user=request.user)
+        .select_related('user')
+    }
+    for result in results:
+        result['other'] = others.get(result['message'].thread_id)
+    return render(request, 'communication/search.html', {'query': query, 'results': results})
@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Quartier
+
+
+@admin.register(Quartier)
+class QuartierAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city', 'latitude', 'longitude')
+    list_filter = ('city',)
+    search_fields = ('name',)
@@ -7,6 +7,7 @@ from django.views.decorators.http import require_POST
 # Imports des modèles
 from apps.profiles.models import TutorProfile
 from apps.marketplace.models import CourseRequest
+from apps.marketplace.scoring import requalify_country
 from apps.core.models import Country
 from apps.actualites.models import Article, Category
 
@@ -218,12 +219,19 @@ def add_country(request):
 @user_passes_test(lambda u: u.is_staff)
 def update_country_config(request, country_id):
     c = get_object_or_404(Country, pk=country_id)
+    old_threshold = c.min_budget_threshold
     c.subscription_price = int(request.POST.get('subscription_price'))
     c.min_budget_threshold = int(request.POST.get('min_budget_threshold'))
     c.contact_prices = request.POST.get('contact_prices')
     c.casier_delay_weeks = int(request.POST.get('casier_delay_weeks'))
+    c.request_expiry_days = int(request.POST.get('request_expiry_days') or c.request_expiry_days)
     c.save()
     messages.success(request, "Config mise à jour.")
+
+    # Nouveau seuil de budget : les leads du pays sont re-qualifiés
+    if c.min_budget_threshold != old_threshold:
+        changes = requalify_country(c)
+        messages.info(request, f"{sum(changes.values())} demande(s) ont changé de qualification.")
     return redirect('admin_dashboard')
 
 @user_passes_test(lambda u: u.is_staff)
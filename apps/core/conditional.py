@@ -0,0 +1,48 @@
+"""
+GET conditionnels (ETag / Last-Modified) pour les pages propres à un utilisateur.
+
+La vue calcule un validateur bon marché (quelques colonnes déjà chargées, un agrégat)
+AVANT le travail coûteux ; si le navigateur a déjà cette version, on répond 304
+sans rendre de template ni exécuter les requêtes de contenu.
+
+Le validateur d'une page "connectée" doit couvrir tout ce qu'elle affiche :
+en plus des données de la vue, base.html montre le badge de non lus, et le
+formulaire embarque le jeton CSRF (qui change à la connexion).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def page_etag(request, *parts):
+    """ ETag faible d'une page personnelle : utilisateur + jeton CSRF + `parts`. """
+    raw = '|'.join(str(part) for part in (
+        request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), *parts,
+    ))
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Réponse 304 si le navigateur a déjà cette version, sinon None.
+    Jamais de 304 s'il reste des messages flash à afficher (ils seraient perdus de vue).
+    """
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """ En-têtes de validation + revalidation obligatoire (contenu privé, jamais servi sans vérification). """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
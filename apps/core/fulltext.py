@@ -0,0 +1,181 @@
+"""
+Recherche plein texte avec backend interchangeable.
+
+- SQLite (local) : table virtuelle FTS5, classement bm25.
+- PostgreSQL (Render) : table tsvector + index GIN, configuration 'french', classement ts_rank_cd.
+
+Chaque index est une table "fts_<nom>" qui associe un doc_id (l'id de l'objet indexé)
+à deux colonnes pondérées : `title` (mots importants) et `body` (texte libre).
+Les accents sont retirés côté Python avant indexation ET avant recherche,
+le comportement est donc identique quel que soit le backend.
+"""
+import re
+import unicodedata
+
+from django.db import connection as default_connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+MAX_QUERY_TERMS = 8
+INDEX_NAME_RE = re.compile(r'^[a-z_]+$')
+
+
+def normalize_text(text):
+    """ Minuscules et suppression des accents ("Élève" -> "eleve"). """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def query_terms(query):
+    """ Découpe une saisie utilisateur en mots normalisés (ponctuation ignorée). """
+    return re.findall(r'\w+', normalize_text(query))[:MAX_QUERY_TERMS]
+
+
+def highlight(text, query, radius=80):
+    """
+    Extrait HTML (échappé) du texte ORIGINAL autour du premier mot trouvé,
+    les mots commençant par un terme de `query` entourés de <mark>.
+    La correspondance se fait sur le texte normalisé, comme la recherche.
+    """
+    terms = query_terms(query)
+    text = text or ''
+    words = [(m.start(), m.end()) for m in re.finditer(r'\w+', text)
+             if any(normalize_text(m.group()).startswith(term) for term in terms)]
+    center = words[0][0] if words else 0
+    start = max(0, center - radius)
+    end = min(len(text), center + radius)
+    if start:
+        # Pas de mot coupé en début d'extrait
+        space = text.find(' ', start, center)
+        start = space + 1 if space != -1 else start
+
+    parts, position = [], start
+    for word_start, word_end in words:
+        if word_start < start or word_end > end:
+            continue
+        parts.append(escape(text[position:word_start]))
+        parts.append(f'<mark>{escape(text[word_start:word_end])}</mark>')
+        position = word_end
+    parts.append(escape(text[position:end]))
+    return mark_safe(('… ' if start else '') + ''.join(parts) + (' …' if end < len(text) else ''))
+
+
+class BaseBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def table(self, name):
+        if not INDEX_NAME_RE.match(name):
+            raise ValueError(f"Nom d'index invalide : {name!r}")
+        return f'fts_{name}'
+
+    def create_index(self, name):
+        raise NotImplementedError
+
+    def drop_index(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table(name)}')
+
+    def update(self, name, doc_id, title, body):
+        raise NotImplementedError
+
+    def delete(self, name, doc_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(name)} WHERE {self.id_column} = %s', [doc_id])
+
+    def clear(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(name)}')
+
+    def search(self, name, query, limit, within=None):
+        """
+        Retourne les doc_id correspondant à TOUS les mots de `query`,
+        du plus pertinent au moins pertinent (préfixes acceptés : "math" trouve "maths").
+        `within` : queryset .values('pk') qui restreint les documents possibles
+        (ex : les messages des conversations d'un utilisateur), appliqué dans la même requête.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        restrict, restrict_params = '', []
+        if within is not None:
+            subquery, restrict_params = within.query.sql_with_params()
+            restrict = f' AND {self.id_column} IN ({subquery})'
+        sql, params = self.search_sql(self.table(name), terms, restrict)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql + ' LIMIT %s', params + list(restrict_params) + [limit])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteBackend(BaseBackend):
+    id_column = 'rowid'
+
+    def create_index(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table(name)} "
+                f"USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def update(self, name, doc_id, title, body):
+        table = self.table(name)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [doc_id])
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, title, body) VALUES (%s, %s, %s)',
+                [doc_id, normalize_text(title), normalize_text(body)],
+            )
+
+    def search_sql(self, table, terms, restrict=''):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # bm25 : plus petit = plus pertinent ; le titre pèse 10x plus que le corps
+        return (
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s{restrict} '
+            f'ORDER BY bm25({table}, 10.0, 1.0), rowid DESC',
+            [match],
+        )
+
+
+class PostgresBackend(BaseBackend):
+    id_column = 'doc_id'
+
+    def create_index(self, name):
+        table = self.table(name)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} '
+                f'(doc_id bigint PRIMARY KEY, document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_gin ON {table} USING GIN (document)')
+
+    def update(self, name, doc_id, title, body):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table(name)} (doc_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('french', %s), 'A') || setweight(to_tsvector('french', %s), 'B')) "
+                f"ON CONFLICT (doc_id) DO UPDATE SET document = EXCLUDED.document",
+                [doc_id, normalize_text(title), normalize_text(body)],
+            )
+
+    def search_sql(self, table, terms, restrict=''):
+        # Les termes ne contiennent que des caractères \w : pas d'injection possible dans le tsquery
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return (
+            f"SELECT doc_id FROM {table}, to_tsquery('french', %s) AS q "
+            f"WHERE document @@ q{restrict} ORDER BY ts_rank_cd(document, q) DESC, doc_id DESC",
+            [tsquery],
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    try:
+        return BACKENDS[connection.vendor](connection)
+    except KeyError:
+        raise NotImplementedError(f"Recherche plein texte non disponible pour {connection.vendor}")
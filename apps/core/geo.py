@@ -0,0 +1,120 @@
+"""
+Outils géographiques sans PostGIS :
+- distance haversine ;
+- index en grille (cases de GRID_CELL_DEG degrés) pour les recherches "à moins de X km" ;
+- rattachement d'un quartier saisi en texte libre au référentiel core.Quartier.
+"""
+import math
+import re
+
+from .fulltext import normalize_text
+from .models import Quartier
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+GRID_CELL_DEG = 0.02  # ~2,2 km à l'équateur : quelques cases suffisent pour un rayon de 5 km
+
+# Centroïdes approximatifs des communes d'Abidjan (CDC) et des quartiers les plus saisis
+ABIDJAN_CENTROIDS = {
+    "Adjamé": (5.3622, -4.0231),
+    "Attécoubé": (5.3390, -4.0400),
+    "Cocody": (5.3560, -3.9860),
+    "Koumassi": (5.2960, -3.9490),
+    "Marcory": (5.3030, -3.9830),
+    "Plateau": (5.3250, -4.0200),
+    "Treichville": (5.2920, -4.0090),
+    "Yopougon": (5.3450, -4.0790),
+    "Abobo": (5.4190, -4.0200),
+    "Anyama": (5.4950, -4.0520),
+    "Bingerville": (5.3560, -3.8860),
+    "Port-Bouët": (5.2560, -3.9300),
+    "Riviera": (5.3650, -3.9600),
+    "Deux Plateaux": (5.3720, -3.9990),
+    "Angré": (5.3960, -3.9870),
+}
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(lat, lng):
+    return math.floor(lat / GRID_CELL_DEG), math.floor(lng / GRID_CELL_DEG)
+
+
+class GridIndex:
+    """
+    Points (id -> lat, lng) rangés par case de grille.
+    add / remove sont en O(1) : l'index se maintient point par point, sans reconstruction.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.cells = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, obj_id, lat, lng):
+        if self.positions.get(obj_id) == (lat, lng):
+            return
+        self.remove(obj_id)
+        self.positions[obj_id] = (lat, lng)
+        self.cells.setdefault(_cell(lat, lng), set()).add(obj_id)
+
+    def remove(self, obj_id):
+        position = self.positions.pop(obj_id, None)
+        if position is None:
+            return
+        cell = _cell(*position)
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(obj_id)
+            if not members:
+                del self.cells[cell]
+
+    def nearest(self, lat, lng, radius_km, limit=None):
+        """ [(id, distance_km)] à moins de radius_km, du plus proche au plus lointain. """
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        min_row, min_col = _cell(lat - lat_span, lng - lng_span)
+        max_row, max_col = _cell(lat + lat_span, lng + lng_span)
+
+        found = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for obj_id in self.cells.get((row, col), ()):
+                    distance = haversine_km(lat, lng, *self.positions[obj_id])
+                    if distance <= radius_km:
+                        found.append((obj_id, distance))
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found[:limit] if limit else found
+
+
+def match_quartier(city_id, text, quartiers):
+    """
+    Retrouve le Quartier désigné par un texte libre ("Cocody Riviera 2", "riviera").
+    `quartiers` : liste de (id, city_id, nom). On cherche les noms présents comme mots
+    entiers dans le texte ; le plus long gagne ("Riviera" plutôt que "Cocody").
+    """
+    words = ' '.join(re.findall(r'\w+', normalize_text(text)))
+    if not words or city_id is None:
+        return None
+    best, best_length = None, 0
+    for quartier_id, quartier_city_id, name in quartiers:
+        if quartier_city_id != city_id:
+            continue
+        key = ' '.join(re.findall(r'\w+', normalize_text(name)))
+        if key and len(key) > best_length and re.search(rf'\b{re.escape(key)}\b', words):
+            best, best_length = quartier_id, len(key)
+    return best
+
+
+def resolve_quartier(city_id, text):
+    """ id du Quartier correspondant au texte saisi pour cette ville (ou None). """
+    if city_id is None or not text:
+        return None
+    return match_quartier(city_id, text, Quartier.objects.filter(city_id=city_id).values_list('id', 'city_id', 'name'))
@@ -0,0 +1,179 @@
+"""
+Déclinaisons redimensionnées des images envoyées (photos de profs, images d'articles).
+
+Après l'envoi, on produit pour chaque largeur de `widths` une version WebP et une
+version JPEG (repli pour les vieux navigateurs), sans métadonnées EXIF (position GPS
+des photos de téléphone, modèle de l'appareil...). L'orientation EXIF est appliquée
+aux pixels avant d'être retirée.
+
+Les chemins sont rangés sur le modèle, dans un JSONField :
+    {'source': <nom du fichier d'origine>,
+     'images': [{'width': 64, 'webp': '...', 'jpeg': '...'}, ...]}
+'source' permet de savoir si les déclinaisons correspondent encore à l'image actuelle.
+Le tag {% responsive_image %} (core/templatetags/images.py) en fait un srcset.
+
+Protection contre les "bombes de décompression" : la taille en pixels est lue dans
+l'en-tête, AVANT de décoder l'image ; au-delà de MAX_SOURCE_PIXELS on abandonne
+(l'original reste servi tel quel). Une image illisible ou tronquée est refusée de même.
+
+Le décodage et les 6 encodages (≈ 0,5 à 1 s pour une photo de téléphone) ne se font
+pas dans la requête d'envoi : refresh_in_background() les confie à un thread du
+processus. Si le processus s'arrête avant, l'image garde simplement l'original ;
+build_image_derivatives rattrape les déclinaisons manquantes.
+"""
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger('polynova.images')
+
+TUTOR_PHOTO_WIDTHS = (64, 128, 256)
+ARTICLE_IMAGE_WIDTHS = (480, 960, 1440)
+
+DERIVATIVES_DIR = 'derivatives'
+MAX_SOURCE_PIXELS = 50_000_000  # 50 Mpx : au-delà d'un capteur de téléphone
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+class ImageRejected(Exception):
+    """ Image illisible ou trop grande pour être décodée sans risque. """
+
+
+def _open_source(name):
+    try:
+        with default_storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            width, height = image.size  # En-tête seulement, rien n'est encore décodé
+            if width * height > MAX_SOURCE_PIXELS:
+                raise ImageRejected(f"{name} : {width}x{height} px, au-delà de la limite")
+            image.load()
+        image = ImageOps.exif_transpose(image)
+        # WebP et JPEG : pas de palette ; la transparence n'est gardée que pour le WebP
+        return image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError, SyntaxError) as exc:
+        # Fichier absent, tronqué (OSError), en-tête ou EXIF corrompus (ValueError, SyntaxError)
+        raise ImageRejected(f"{name} : {exc}") from exc
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'jpeg':
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        # Pas de exif=... : les métadonnées ne sont pas recopiées
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def build_derivatives(name, widths):
+    """
+    Produit et enregistre les déclinaisons de l'image `name` (chemin dans le stockage).
+    Sans accès à la base : utilisable depuis un processus du pool (build_image_derivatives).
+    Lève ImageRejected si l'image ne doit pas être traitée.
+    """
+    image = _open_source(name)
+    folder, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    # Pas d'agrandissement : les largeurs au-delà de l'original se ramènent à l'original
+    targets = sorted({min(width, image.width) for width in widths})
+
+    images = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        entry = {'width': width}
+        for fmt, extension in (('webp', 'webp'), ('jpeg', 'jpg')):
+            path = os.path.join(DERIVATIVES_DIR, folder, f'{stem}-{width}w.{extension}')
+            entry[fmt] = default_storage.save(path, _encode(resized, fmt))
+        images.append(entry)
+    return {'source': name, 'images': images}
+
+
+def derivatives_outdated(field_file, derivatives):
+    """ Vrai s'il y a une image dont les déclinaisons manquent ou datent d'une image précédente. """
+    return bool(field_file) and (derivatives or {}).get('source') != field_file.name
+
+
+def delete_derivatives(derivatives):
+    for entry in (derivatives or {}).get('images', []):
+        for fmt in ('webp', 'jpeg'):
+            default_storage.delete(entry[fmt])
+
+
+def refresh_derivatives(model, pk, field_name, derivatives_field, widths, force=False):
+    """
+    (Re)génère les déclinaisons de l'image d'une ligne et les enregistre par update()
+    (sans repasser par save() ni ses signaux). Retourne True si la ligne a changé.
+    """
+    row = model.objects.filter(pk=pk).values(field_name, derivatives_field).first()
+    if row is None or not row[field_name]:
+        return False
+    name, previous = row[field_name], row[derivatives_field]
+    if not force and (previous or {}).get('source') == name:
+        return False
+    try:
+        derivatives = build_derivatives(name, widths)
+    except ImageRejected as exc:
+        derivatives = rejected(name, exc)
+    return store_derivatives(model, pk, field_name, derivatives_field, derivatives, previous)
+
+
+_executor = None
+
+
+def _run(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Échec de la génération des déclinaisons")
+    finally:
+        connections.close_all()  # Connexions propres à ce thread
+
+
+def refresh_in_background(func, *args):
+    """
+    Exécute func(*args) hors de la requête, dans l'unique thread de travail du processus
+    (les images sont traitées une par une). IMAGE_DERIVATIVES_IN_BACKGROUND = False :
+    exécution immédiate (commandes, shell, tests).
+    """
+    global _executor
+    if not getattr(settings, 'IMAGE_DERIVATIVES_IN_BACKGROUND', True):
+        func(*args)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    _executor.submit(_run, func, args)
+
+
+def rejected(name, exc):
+    """ Image refusée : noté sur le modèle pour ne pas la retraiter à chaque sauvegarde (l'original reste servi). """
+    logger.warning("Déclinaisons non générées : %s", exc)
+    return {'source': name, 'images': []}
+
+
+def store_derivatives(model, pk, field_name, derivatives_field, derivatives, previous=None):
+    """
+    Enregistre des déclinaisons calculées, si l'image n'a pas changé entre-temps
+    (UPDATE conditionné au nom du fichier source). Les anciennes sont supprimées.
+    """
+    updated = model.objects.filter(pk=pk, **{field_name: derivatives['source']}).update(
+        **{derivatives_field: derivatives}
+    )
+    if not updated:
+        delete_derivatives(derivatives)
+        return False
+    if previous and previous != derivatives:
+        delete_derivatives(previous)
+    return True
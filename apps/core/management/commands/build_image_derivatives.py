@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+
+from apps.actualites.models import Article
+from apps.actualites.page_cache import invalidate_article
+from apps.core.images import (
+    ARTICLE_IMAGE_WIDTHS, TUTOR_PHOTO_WIDTHS, ImageRejected, build_derivatives, rejected, store_derivatives,
+)
+from apps.marketplace.tutor_cards import bump_card_versions
+from apps.profiles.models import TutorProfile
+
+# (modèle, champ image, champ des déclinaisons, largeurs)
+TARGETS = {
+    'tutors': (TutorProfile, 'photo', 'photo_derivatives', TUTOR_PHOTO_WIDTHS),
+    'articles': (Article, 'image', 'image_derivatives', ARTICLE_IMAGE_WIDTHS),
+}
+
+
+def _build(name, widths):
+    """ Exécuté dans un processus du pool : uniquement du travail sur les fichiers. """
+    try:
+        return build_derivatives(name, widths)
+    except ImageRejected as exc:
+        return rejected(name, exc)
+
+
+class Command(BaseCommand):
+    help = "Génère les déclinaisons WebP/JPEG des photos de profs et images d'articles existantes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=sorted(TARGETS), help="Ne traiter que les profs ou que les articles")
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Nombre de processus de redimensionnement")
+        parser.add_argument('--force', action='store_true', help="Regénérer même les déclinaisons à jour")
+
+    def handle(self, *args, **options):
+        names = [options['only']] if options['only'] else sorted(TARGETS)
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            for name in names:
+                self.stdout.write(f"🚀 Déclinaisons des images : {name}...")
+                done = self._process(pool, *TARGETS[name], force=options['force'])
+                self.stdout.write(self.style.SUCCESS(f"✅ {done} image(s) traitée(s)."))
+
+    def _process(self, pool, model, field_name, derivatives_field, widths, force):
+        rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        jobs = {}
+        for pk, name, previous in rows.values_list('pk', field_name, derivatives_field).iterator():
+            if force or (previous or {}).get('source') != name:
+                jobs[pool.submit(_build, name, widths)] = (pk, previous)
+
+        changed = []
+        for future in as_completed(jobs):
+            pk, previous = jobs[future]
+            try:
+                derivatives = future.result()
+            except Exception as exc:
+                # Erreur imprévue (stockage...) : on signale et on continue avec les autres images
+                self.stderr.write(self.style.ERROR(f"❌ {model._meta.model_name} #{pk} : {exc}"))
+                continue
+            if store_derivatives(model, pk, field_name, derivatives_field, derivatives, previous):
+                changed.append(pk)
+
+        # Caches à rafraîchir pour que les pages passent au srcset
+        if model is TutorProfile:
+            bump_card_versions(changed)  # Version en base : vue par tous les processus
+        elif changed:
+            # Version en base : vue par tous les processus
+            invalidate_article(*Article.objects.filter(pk__in=changed).values_list('slug', flat=True))
+        return len(changed)
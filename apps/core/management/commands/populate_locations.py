@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from apps.core.geo import ABIDJAN_CENTROIDS
 from apps.core.models import Country, City, Quartier
 
 class Command(BaseCommand):
@@ -43,25 +44,13 @@ class Command(BaseCommand):
         # 3. Création des COMMUNES d'Abidjan (Selon le CDC) 
         abidjan = ci_cities["Abidjan"]
         
-        communes_abidjan = [
-            "Adjamé", 
-            "Attécoubé", 
-            "Cocody", 
-            "Koumassi", 
-            "Marcory", 
-            "Plateau", 
-            "Treichville", 
-            "Yopougon", 
-            "Abobo", 
-            "Anyama", 
-            "Bingerville"
-        ]
-
+        # Communes du CDC + quartiers courants, avec leur centroïde (recherche par proximité)
         count_quartiers = 0
-        for nom_commune in communes_abidjan:
-            quartier, q_created = Quartier.objects.get_or_create(
+        for nom_commune, (lat, lng) in ABIDJAN_CENTROIDS.items():
+            quartier, q_created = Quartier.objects.update_or_create(
                 city=abidjan,
-                name=nom_commune
+                name=nom_commune,
+                defaults={"latitude": lat, "longitude": lng}
             )
             if q_created:
                 count_quartiers += 1
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.core.geo import ABIDJAN_CENTROIDS
+
+
+def seed_abidjan(apps, schema_editor):
+    # Les villes sont créées par populate_locations : on ne complète que si Abidjan existe déjà
+    City = apps.get_model('core', 'City')
+    Quartier = apps.get_model('core', 'Quartier')
+    for abidjan in City.objects.filter(name='Abidjan'):
+        for name, (lat, lng) in ABIDJAN_CENTROIDS.items():
+            Quartier.objects.update_or_create(city=abidjan, name=name, defaults={'latitude': lat, 'longitude': lng})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_country_options_country_casier_delay_weeks_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Quartier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Latitude (centroïde)')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Longitude (centroïde)')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quartiers', to='core.city', verbose_name='Ville')),
+            ],
+            options={
+                'verbose_name': 'Quartier',
+                'verbose_name_plural': 'Quartiers',
+                'ordering': ['name'],
+                'unique_together': {('city', 'name')},
+            },
+        ),
+        migrations.RunPython(seed_abidjan, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_quartier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='request_expiry_days',
+            field=models.PositiveIntegerField(default=30, verbose_name='Expiration des demandes (jours)'),
+        ),
+    ]
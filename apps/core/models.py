@@ -31,6 +31,8 @@ class Country(TimeStampedModel):
     
     # --- PARAMÈTRES DÉLAIS (CDC) ---
     casier_delay_weeks = models.IntegerField(default=4, verbose_name="Délai Casier (Semaines)")
+    # Une demande active sans suite passe en "expirée" après ce délai (marketplace/lifecycle.py)
+    request_expiry_days = models.PositiveIntegerField(default=30, verbose_name="Expiration des demandes (jours)")
     relance_days = models.CharField(
         max_length=50, 
         default="3,7,10", 
@@ -47,4 +49,28 @@ class Country(TimeStampedModel):
 class City(models.Model):
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="cities")
     name = models.CharField(max_length=100)
-    def __str__(self): return self.name
\ No newline at end of file
+    def __str__(self): return self.name
+
+class Quartier(models.Model):
+    """
+    Commune / quartier d'une ville, avec son centroïde (recherche de profs à proximité).
+    Les champs texte "quartier" des profils et des demandes y sont rattachés
+    automatiquement quand le nom est reconnu (cf. core/geo.py).
+    """
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="quartiers", verbose_name="Ville")
+    name = models.CharField(max_length=100, verbose_name="Nom")
+    latitude = models.FloatField(null=True, blank=True, verbose_name="Latitude (centroïde)")
+    longitude = models.FloatField(null=True, blank=True, verbose_name="Longitude (centroïde)")
+
+    def __str__(self):
+        return f"{self.name} ({self.city.name})"
+
+    @property
+    def has_position(self):
+        return self.latitude is not None and self.longitude is not None
+
+    class Meta:
+        verbose_name = "Quartier"
+        verbose_name_plural = "Quartiers"
+        ordering = ['name']
+        unique_together = ('city', 'name')
@@ -0,0 +1,112 @@
+"""
+Pagination par curseur (keyset) sur un couple (colonne de tri, id),
+par défaut (created_at, id).
+
+Contrairement au Paginator de Django, aucune requête COUNT(*) et aucun OFFSET :
+la page N coûte le même prix que la page 1 (un simple parcours d'index
+à partir de la position du curseur).
+"""
+import base64
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(value, pk):
+    """ Sérialise une position (valeur de tri, id) en chaîne opaque utilisable dans une URL. """
+    value = value.isoformat() if hasattr(value, 'isoformat') else repr(value)
+    raw = f"{value}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Retourne (valeur, id) ou None si le curseur est absent ou invalide.
+    La valeur reste une chaîne : c'est le champ du modèle qui la convertit
+    (date ISO, nombre...) lors du filtrage.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        return value, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    """ Une page de résultats et le curseur vers la page suivante. """
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _model_field(model, path):
+    """ Champ désigné par un chemin de lookup ('search_entries__created_at'). """
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def _checked_position(queryset, cursor, order_field):
+    """
+    Position décodée et convertie par le champ de tri, ou None.
+    Un curseur bien encodé mais dont la valeur est invalide (modifié à la main)
+    ramène à la première page au lieu de faire échouer la requête.
+    """
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    value, pk = position
+    try:
+        value = _model_field(queryset.model, order_field).to_python(value)
+    except ValidationError:
+        return None
+    return (value, pk) if value is not None else None
+
+
+def cursor_paginate(queryset, cursor, per_page, filters=None,
+                    order_field='created_at', pk_field='pk'):
+    """
+    Retourne la page qui suit `cursor`, triée par order_field puis id décroissants.
+
+    Les `filters` sont passés dans le MÊME .filter() que la condition de curseur :
+    c'est indispensable quand order_field traverse une relation multi-valuée,
+    sinon Django ajouterait une seconde jointure.
+    La valeur du curseur est lue sur l'objet via le dernier segment de order_field
+    (ex: 'search_entries__created_at' -> obj.created_at).
+    On lit per_page + 1 lignes pour savoir s'il existe une page suivante.
+    """
+    condition = Q(**(filters or {}))
+    position = _checked_position(queryset, cursor, order_field)
+    if position:
+        value, pk = position
+        condition &= (
+            Q(**{f'{order_field}__lt': value})
+            | Q(**{order_field: value, f'{pk_field}__lt': pk})
+        )
+
+    rows = list(
+        queryset.filter(condition).order_by(f'-{order_field}', f'-{pk_field}')[:per_page + 1]
+    )
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        order_attr = order_field.split('__')[-1]
+        next_cursor = encode_cursor(getattr(last, order_attr), last.pk)
+    return CursorPage(items, next_cursor)
@@ -0,0 +1,196 @@
+"""
+Inspection des requêtes SQL exécutées pendant une requête HTTP (ou un bloc de code) :
+
+- chaque requête est enregistrée avec sa durée et, en DEBUG et en tests
+  (QUERY_INSPECTOR_ORIGINS), son origine : ligne du template qui l'a déclenchée,
+  sinon ligne de notre code Python. Remonter la pile à chaque requête coûte cher :
+  en production on ne garde que le nombre, la durée et la forme des requêtes ;
+- détection des N+1 : la même "forme" de requête (SQL sans les valeurs)
+  répétée au moins QUERY_NPLUSONE_THRESHOLD fois ;
+- budget de requêtes par nom d'URL (settings.QUERY_BUDGETS, QUERY_BUDGET_DEFAULT).
+
+Un dépassement lève QueryBudgetExceeded en tests (QUERY_BUDGET_STRICT)
+et est seulement journalisé en production (logger 'polynova.queries').
+"""
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger('polynova.queries')
+
+DEFAULT_NPLUSONE_THRESHOLD = 5
+
+APPS_DIR = os.path.join(str(settings.BASE_DIR), 'apps') + os.sep
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)', re.IGNORECASE)
+
+QueryRecord = namedtuple('QueryRecord', ['sql', 'shape', 'duration', 'origin'])
+
+
+class QueryBudgetExceeded(AssertionError):
+    """ Budget de requêtes dépassé ou N+1 détecté (fait échouer le test en cours). """
+
+
+def query_shape(sql):
+    """
+    "Forme" d'une requête : le SQL sans ses valeurs, pour reconnaître
+    la même requête exécutée avec des paramètres différents.
+    """
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    return _IN_LIST_RE.sub('IN (...)', shape)
+
+
+def _query_origin():
+    """
+    D'où vient la requête : le nœud de template le plus proche s'il y en a un
+    ("marketplace/_request_cards.html:3"), sinon la première frame de nos apps.
+    """
+    frame = sys._getframe(2)
+    python_origin = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        # type() et pas isinstance() : isinstance évaluerait les objets paresseux
+        # (request.user...), donc de nouvelles requêtes pendant qu'on en enregistre une
+        if issubclass(type(node), Node) and getattr(node, 'token', None) is not None and getattr(node, 'origin', None):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if python_origin is None and filename.startswith(APPS_DIR) and filename != __file__:
+            python_origin = f'{os.path.relpath(filename, settings.BASE_DIR)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return python_origin or '?'
+
+
+class QueryRecorder:
+    """
+    Enregistre les requêtes de toutes les connexions pendant `with recorder.record():`
+    (via connection.execute_wrapper, donc aussi quand DEBUG=False).
+    origins=False : pas de parcours de la pile, origine None.
+    """
+
+    def __init__(self, origins=True):
+        self.queries = []
+        self.origins = origins
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            origin = _query_origin() if self.origins else None
+            self.queries.append(QueryRecord(sql, query_shape(sql), time.perf_counter() - start, origin))
+
+    def __len__(self):
+        return len(self.queries)
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def repeated(self, threshold):
+        """ [(forme, nombre d'exécutions, origines)] pour les formes répétées au moins `threshold` fois. """
+        counts = Counter(query.shape for query in self.queries)
+        result = []
+        for shape, count in counts.most_common():
+            if count < threshold:
+                break
+            origins = Counter(query.origin for query in self.queries if query.shape == shape and query.origin)
+            result.append((shape, count, [origin for origin, _ in origins.most_common(3)]))
+        return result
+
+
+def query_budget(url_name):
+    """ Nombre maximal de requêtes autorisé pour une vue (None = pas de limite). """
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(url_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+def find_problems(recorder, budget=None, threshold=None):
+    """ Liste des problèmes détectés (chaînes lisibles), vide si tout va bien. """
+    if threshold is None:
+        threshold = getattr(settings, 'QUERY_NPLUSONE_THRESHOLD', DEFAULT_NPLUSONE_THRESHOLD)
+    problems = []
+    if budget is not None and len(recorder) > budget:
+        problems.append(f'{len(recorder)} requêtes SQL pour un budget de {budget}')
+    for shape, count, origins in recorder.repeated(threshold):
+        source = f' depuis {", ".join(origins)}' if origins else ''
+        problems.append(f'N+1 probable : {count}x "{shape[:200]}"{source}')
+    return problems
+
+
+def _report(label, recorder, problems):
+    total_ms = sum(query.duration for query in recorder.queries) * 1000
+    lines = [f'[{label}] {len(recorder)} requêtes, {total_ms:.1f} ms', *(f'  - {p}' for p in problems)]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_query_budget(max_queries=None, url_name=None, threshold=None):
+    """
+    Helper de test :
+
+        with assert_query_budget(url_name='tutor_list'):
+            self.client.get(reverse('tutor_list'))
+
+    Lève QueryBudgetExceeded si le budget (explicite ou celui de url_name) est dépassé
+    ou si une requête se répète (N+1).
+    """
+    budget = max_queries if max_queries is not None else (query_budget(url_name) if url_name else None)
+    recorder = QueryRecorder()
+    with recorder.record():
+        yield recorder
+    problems = find_problems(recorder, budget, threshold)
+    if problems:
+        raise QueryBudgetExceeded(_report(url_name or 'bloc', recorder, problems))
+
+
+class QueryBudgetTestMixin:
+    """ À mélanger dans un TestCase : self.assertQueryBudget(...) comme context manager. """
+
+    def assertQueryBudget(self, max_queries=None, url_name=None, threshold=None):
+        return assert_query_budget(max_queries, url_name, threshold)
+
+
+class QueryInspectorMiddleware:
+    """
+    Enregistre les requêtes SQL de chaque requête HTTP et vérifie le budget
+    de la vue appelée (nom d'URL, ex: 'tutor_list' ou 'actualites:list').
+    Désactivé si QUERY_INSPECTOR_ENABLED est faux ; origines seulement si QUERY_INSPECTOR_ORIGINS.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.origins = getattr(settings, 'QUERY_INSPECTOR_ORIGINS', settings.DEBUG)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(origins=self.origins)
+        with recorder.record():
+            response = self.get_response(request)
+
+        url_name = request.resolver_match.view_name if request.resolver_match else None
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(len(recorder))
+
+        problems = find_problems(recorder, query_budget(url_name) if url_name else None)
+        if problems:
+            message = _report(url_name or request.path, recorder, problems)
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,37 @@
+"""
+{% load images %}
+{% responsive_image tutor.photo tutor.photo_derivatives sizes="64px" class="h-16 w-16 rounded-full" alt="" %}
+
+Émet un <picture> : srcset WebP, puis <img> avec srcset JPEG (navigateurs sans WebP).
+Sans déclinaisons à jour (image pas encore traitée, ou refusée), simple <img> sur l'original.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def _srcset(images, fmt):
+    return ', '.join(f"{default_storage.url(entry[fmt])} {entry['width']}w" for entry in images)
+
+
+@register.simple_tag
+def responsive_image(image, derivatives, sizes='100vw', **attrs):
+    if not image:
+        return ''
+    derivatives = derivatives or {}
+    images = derivatives.get('images') if derivatives.get('source') == image.name else None
+    if not images:
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+    largest = images[-1]
+    # display: contents : <picture> ne crée pas de boîte, les classes de l'<img> s'appliquent comme avant
+    return format_html(
+        '<picture style="display: contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}>'
+        '</picture>',
+        _srcset(images, 'webp'), sizes,
+        default_storage.url(largest['jpeg']), _srcset(images, 'jpeg'), sizes, flatatt(attrs),
+    )
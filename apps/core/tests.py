@@ -1,3 +1,112 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image, ImageFile
+
+from apps.profiles.models import TutorProfile
+
+from . import images
+from .images import TUTOR_PHOTO_WIDTHS, ImageRejected, build_derivatives, refresh_derivatives
+from .models import Country
+from .pagination import cursor_paginate, encode_cursor
+
+
+class CursorPaginationTests(TestCase):
+    """ Pagination par curseur : ex aequo sur la colonne de tri, curseurs invalides. """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(7):
+            Country.objects.create(name=f'Pays {i}', code=f'P{i}', min_budget_threshold=1000 * (i % 2))
+        # Trois pays créés "au même instant" : seul l'id les départage
+        Country.objects.filter(code__in=['P1', 'P2', 'P3']).update(created_at=now)
+        Country.objects.exclude(code__in=['P1', 'P2', 'P3']).update(created_at=now - timedelta(days=1))
+
+    def _walk(self, per_page, **kwargs):
+        """ Tous les ids, page après page, en suivant next_cursor. """
+        ids, cursor = [], None
+        while True:
+            page = cursor_paginate(Country.objects.all(), cursor, per_page, **kwargs)
+            ids += [country.pk for country in page]
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_round_trip_with_ties(self):
+        expected = list(Country.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        for per_page in (1, 2, 3):
+            self.assertEqual(self._walk(per_page), expected)
+
+    def test_round_trip_on_other_order_field(self):
+        expected = list(Country.objects.order_by('-min_budget_threshold', '-pk').values_list('pk', flat=True))
+        self.assertEqual(self._walk(2, order_field='min_budget_threshold'), expected)
+
+    def test_garbage_cursor_gives_first_page(self):
+        first = [country.pk for country in cursor_paginate(Country.objects.all(), None, 3)]
+        for cursor in ('%%%', 'bm90LWEtY3Vyc29y', encode_cursor('pas une date', 5)):
+            page = cursor_paginate(Country.objects.all(), cursor, 3)
+            self.assertEqual([country.pk for country in page], first)
+
+    def test_cursor_value_checked_against_order_field(self):
+        # Curseur d'un tri par date rejoué sur un tri numérique : première page, pas d'erreur SQL
+        first = cursor_paginate(Country.objects.all(), None, 3, order_field='min_budget_threshold')
+        page = cursor_paginate(Country.objects.all(), encode_cursor(timezone.now(), 3), 3,
+                               order_field='min_budget_threshold')
+        self.assertEqual(list(page), list(first))
+
+
+class ImageDerivativeTests(TestCase):
+    """ Déclinaisons des images : refus des images trop grandes ou illisibles, avant décodage. """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _upload(self, name, size=(200, 100)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'blue').save(buffer, 'PNG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_derivatives_capped_at_original_width(self):
+        name = self._upload('tutors/photos/prof.png', size=(100, 50))
+        derivatives = build_derivatives(name, TUTOR_PHOTO_WIDTHS)
+        self.assertEqual([entry['width'] for entry in derivatives['images']], [64, 100])
+
+    def test_too_many_pixels_rejected_before_decoding(self):
+        name = self._upload('tutors/photos/prof.png')
+        with mock.patch.object(images, 'MAX_SOURCE_PIXELS', 200 * 100 - 1), \
+                mock.patch.object(ImageFile.ImageFile, 'load') as load:
+            with self.assertRaises(ImageRejected):
+                build_derivatives(name, TUTOR_PHOTO_WIDTHS)
+        load.assert_not_called()
+
+    def test_truncated_image_rejected(self):
+        name = self._upload('tutors/photos/prof.png')
+        with default_storage.open(name, 'rb') as source:
+            head = source.read()[:60]
+        truncated = default_storage.save('tutors/photos/coupee.png', ContentFile(head))
+        with self.assertRaises(ImageRejected):
+            build_derivatives(truncated, TUTOR_PHOTO_WIDTHS)
+
+    def test_rejection_recorded_on_model(self):
+        name = self._upload('tutors/photos/prof.png')
+        user = get_user_model().objects.create(username='prof', role='tutor')
+        tutor = TutorProfile.objects.create(user=user, bio='Prof', photo=name)
+        with mock.patch.object(images, 'MAX_SOURCE_PIXELS', 100), self.assertLogs('polynova.images', 'WARNING'):
+            self.assertTrue(refresh_derivatives(TutorProfile, tutor.pk, 'photo', 'photo_derivatives', TUTOR_PHOTO_WIDTHS))
+        # Refus noté : l'image n'est pas retraitée à la sauvegarde suivante
+        tutor.refresh_from_db()
+        self.assertEqual(tutor.photo_derivatives, {'source': name, 'images': []})
+        self.assertFalse(refresh_derivatives(TutorProfile, tutor.pk, 'photo', 'photo_derivatives', TUTOR_PHOTO_WIDTHS))
@@ -0,0 +1,109 @@
+"""
+Fil des demandes de chaque prof, écrit à l'avance (fan-out à l'écriture).
+
+Quand un parent crée ou modifie une demande, on calcule une fois pour toutes
+les profs concernés (matière + niveau + ville, ou cours en ligne des deux côtés)
+via l'index de l'annuaire, et on écrit leurs lignes FeedItem par lots.
+La place de marché d'un prof n'est plus qu'une lecture de ses lignes.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from apps.profiles.models import TutorProfile, TutorSearchEntry
+from .models import CourseRequest, FeedItem
+
+FEED_BATCH_SIZE = 1000
+
+
+def matching_tutor_ids(course_request, subject_ids):
+    """
+    Profs validés qui enseignent au moins une des matières, au niveau demandé,
+    dans la ville de la demande (ou en ligne si le parent l'accepte).
+    Un prof qui enseigne plusieurs des matières a plusieurs lignes d'index, d'où le DISTINCT.
+    """
+    if not subject_ids:
+        return set()
+    where = Q(city_id=course_request.city_id) if course_request.city_id else Q(pk__in=[])
+    if course_request.is_online:
+        where |= Q(tutor__is_online_class=True)
+    entries = TutorSearchEntry.objects.filter(
+        where, subject_id__in=subject_ids, level_id=course_request.level_id,
+    )
+    return set(entries.values_list('tutor_id', flat=True).distinct())
+
+
+def fan_out_request(course_request):
+    """
+    (Re)calcule les lignes de fil d'une demande après création / modification.
+    Retourne le nombre de profs qui la voient.
+    """
+    if course_request.status != 'active':
+        prune_request(course_request.pk)
+        return 0
+
+    subject_ids = list(course_request.subjects.values_list('id', flat=True))
+    tutor_ids = matching_tutor_ids(course_request, subject_ids)
+
+    with transaction.atomic():
+        existing = FeedItem.objects.filter(request_id=course_request.pk)
+        existing.exclude(tutor_id__in=tutor_ids).delete()
+        already = set(existing.values_list('tutor_id', flat=True))
+        FeedItem.objects.bulk_create(
+            [FeedItem(tutor_id=tutor_id, request_id=course_request.pk, created_at=course_request.created_at)
+             for tutor_id in tutor_ids - already],
+            batch_size=FEED_BATCH_SIZE, ignore_conflicts=True,
+        )
+    return len(tutor_ids)
+
+
+def prune_request(request_id):
+    """ La demande n'est plus visible (conclue, expirée, abandonnée...). """
+    return FeedItem.objects.filter(request_id=request_id).delete()[0]
+
+
+def prune_feeds():
+    """ Filet de sécurité : supprime les lignes des demandes passées inactives par un update() en masse. """
+    return FeedItem.objects.exclude(request__status='active').delete()[0]
+
+
+def refresh_tutor_feed(tutor_id):
+    """
+    Reconstruit le fil d'UN prof (validation, changement de matières / niveaux / ville) :
+    les demandes actives déjà publiées n'ont pas été "poussées" vers lui.
+    """
+    tutor = TutorProfile.objects.filter(pk=tutor_id, status='validated').first()
+    with transaction.atomic():
+        FeedItem.objects.filter(tutor_id=tutor_id).delete()
+        if tutor is None:
+            return 0
+        entries = TutorSearchEntry.objects.filter(tutor_id=tutor_id, subject__isnull=False)
+        # Niveau NULL sur la demande (niveau supprimé) : toute la matière, comme dans matching_tutor_ids
+        levels = Q(level_id__in=entries.values('level_id')) | Q(level__isnull=True)
+        skills = Q(subjects__in=entries.values('subject_id')) & levels
+        where = Q(city_id=tutor.city_id) if tutor.city_id else Q(pk__in=[])
+        if tutor.is_online_class:
+            where |= Q(is_online=True)
+        rows = (CourseRequest.objects.filter(skills, where, status='active')
+                .values_list('id', 'created_at').distinct())
+        FeedItem.objects.bulk_create(
+            [FeedItem(tutor_id=tutor_id, request_id=pk, created_at=created_at) for pk, created_at in rows],
+            batch_size=FEED_BATCH_SIZE,
+        )
+    return len(rows)
+
+
+def rebuild_feeds():
+    """ Recalcule tous les fils à partir des demandes actives. Retourne le nombre de lignes. """
+    with transaction.atomic():
+        FeedItem.objects.all().delete()
+        total = 0
+        for course_request in CourseRequest.objects.filter(status='active').prefetch_related('subjects'):
+            subject_ids = [subject.pk for subject in course_request.subjects.all()]
+            tutor_ids = matching_tutor_ids(course_request, subject_ids)
+            FeedItem.objects.bulk_create(
+                [FeedItem(tutor_id=tutor_id, request_id=course_request.pk, created_at=course_request.created_at)
+                 for tutor_id in tutor_ids],
+                batch_size=FEED_BATCH_SIZE,
+            )
+            total += len(tutor_ids)
+    return total
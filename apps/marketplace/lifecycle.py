@@ -0,0 +1,151 @@
+"""
+Cycle de vie des demandes (CDC Section 12.1 & 13) : relances puis expiration.
+
+- Relances : à chaque jour de Country.relance_days ("3,7,10"), une demande encore
+  active reçoit une ligne RequestReminder (file d'envoi, idempotente).
+- Expiration : au-delà de Country.request_expiry_days sans être conclue, la demande
+  passe en 'expired' et sort du fil des profs et des suggestions.
+  (Country.casier_delay_weeks n'a rien à voir : c'est le délai laissé au prof pour
+  fournir son casier judiciaire.)
+
+Les délais partent de activated_at : la création, puis chaque réactivation par le
+parent (reactivate_request), qui ouvre un nouveau cycle de relances.
+
+Tout passe par l'index (status, activated_at, id) : chaque tâche ne lit que la tranche
+de demandes devenues "dues" depuis son dernier passage (point de reprise en base),
+par lots de LIFECYCLE_BATCH_SIZE. Conçu pour tourner chaque minute (commande
+run_request_lifecycle) : deux passages qui se chevauchent ne font rien en double
+(unique_together sur les relances, update filtré sur status='active').
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import Country
+from .models import CourseMatch, CourseRequest, FeedItem, RequestReminder, SchedulerCheckpoint
+
+LIFECYCLE_BATCH_SIZE = 1000
+DEFAULT_RELANCE_DAYS = Country._meta.get_field('relance_days').default
+DEFAULT_EXPIRY_DAYS = Country._meta.get_field('request_expiry_days').default
+
+
+def parse_relance_days(value):
+    """ "3,7,10" -> (3, 7, 10). Les valeurs invalides ou nulles sont ignorées. """
+    days = set()
+    for part in (value or '').split(','):
+        part = part.strip()
+        if part.isdigit() and int(part) > 0:
+            days.add(int(part))
+    return tuple(sorted(days))
+
+
+def lifecycle_schedule():
+    """
+    {country_id: (jours de relance, délai d'expiration en jours)}
+    + la clé None (demandes sans ville) avec les valeurs par défaut.
+    """
+    schedule = {
+        country_id: (parse_relance_days(days), expiry_days)
+        for country_id, days, expiry_days in Country.objects.values_list('id', 'relance_days', 'request_expiry_days')
+    }
+    schedule[None] = (parse_relance_days(DEFAULT_RELANCE_DAYS), DEFAULT_EXPIRY_DAYS)
+    return schedule
+
+
+def reactivate_request(course_request, now=None):
+    """ Remet une demande en ligne (à sauvegarder ensuite) : nouveau cycle de relances et d'expiration. """
+    course_request.status = 'active'
+    course_request.activated_at = now or timezone.now()
+    RequestReminder.objects.filter(request=course_request).delete()
+
+
+def _after(checkpoint):
+    """ Demandes strictement après le point de reprise, dans l'ordre (activated_at, id). """
+    if checkpoint.last_activated_at is None:
+        return Q()
+    return (Q(activated_at__gt=checkpoint.last_activated_at)
+            | Q(activated_at=checkpoint.last_activated_at, id__gt=checkpoint.last_id))
+
+
+def enqueue_reminders(day, now=None, batch_size=LIFECYCLE_BATCH_SIZE, schedule=None):
+    """
+    Met en file la relance J+`day` des demandes actives depuis au moins `day` jours,
+    pour les pays dont la configuration prévoit ce jour. Reprend là où le passage
+    précédent s'est arrêté. Retourne le nombre de relances créées.
+    """
+    now = now or timezone.now()
+    schedule = lifecycle_schedule() if schedule is None else schedule
+    checkpoint, _ = SchedulerCheckpoint.objects.get_or_create(name=f'relance:{day}')
+    due = (CourseRequest.objects
+           .filter(status='active', activated_at__lte=now - timedelta(days=day))
+           .order_by('activated_at', 'id'))
+
+    created = 0
+    while True:
+        rows = list(due.filter(_after(checkpoint))
+                    .values_list('id', 'activated_at', 'city__country_id')[:batch_size])
+        if not rows:
+            break
+        reminders = []
+        for pk, activated_at, country_id in rows:
+            relance_days, expiry_days = schedule.get(country_id, schedule[None])
+            # Pas de relance pour une demande qui va expirer (premier passage sur un historique)
+            if day in relance_days and activated_at > now - timedelta(days=expiry_days):
+                reminders.append(RequestReminder(request_id=pk, day=day))
+        with transaction.atomic():
+            created += len(RequestReminder.objects.bulk_create(reminders, ignore_conflicts=True))
+            checkpoint.last_id, checkpoint.last_activated_at = rows[-1][0], rows[-1][1]
+            checkpoint.save(update_fields=['last_id', 'last_activated_at', 'updated_at'])
+        if len(rows) < batch_size:
+            break
+    return created
+
+
+def expire_requests(now=None, batch_size=LIFECYCLE_BATCH_SIZE, schedule=None):
+    """
+    Passe en 'expired' les demandes actives depuis plus que le délai de leur pays, par lots.
+    Un parcours d'index par délai distinct (les pays qui partagent un délai sont groupés).
+    Pas besoin de point de reprise : une demande expirée sort d'elle-même de la tranche
+    (status='active', activated_at <= limite). update() ne déclenche pas les signaux,
+    on purge donc ici le fil des profs et les suggestions des demandes expirées.
+    Retourne le nombre de demandes expirées.
+    """
+    now = now or timezone.now()
+    schedule = lifecycle_schedule() if schedule is None else schedule
+    countries_by_delay = {}
+    for country_id, (_, expiry_days) in schedule.items():
+        countries_by_delay.setdefault(expiry_days, []).append(country_id)
+
+    expired = 0
+    for expiry_days, country_ids in countries_by_delay.items():
+        in_countries = Q(city__country_id__in=[pk for pk in country_ids if pk is not None])
+        if None in country_ids:
+            in_countries |= Q(city__isnull=True)
+        due = (CourseRequest.objects
+               .filter(in_countries, status='active', activated_at__lte=now - timedelta(days=expiry_days))
+               .order_by('activated_at', 'id'))
+        while True:
+            ids = list(due.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                expired += CourseRequest.objects.filter(id__in=ids, status='active').update(status='expired')
+                FeedItem.objects.filter(request_id__in=ids).delete()
+                CourseMatch.objects.filter(request_id__in=ids).delete()
+            if len(ids) < batch_size:
+                break
+    return expired
+
+
+def run_lifecycle(now=None, batch_size=LIFECYCLE_BATCH_SIZE):
+    """
+    Un passage complet du planificateur : relances de chaque jour configuré, puis expiration.
+    Retourne {'reminders': n, 'expired': n}.
+    """
+    now = now or timezone.now()
+    schedule = lifecycle_schedule()
+    days = sorted({day for relance_days, expiry_days in schedule.values() for day in relance_days if day < expiry_days})
+    reminders = sum(enqueue_reminders(day, now, batch_size, schedule) for day in days)
+    return {'reminders': reminders, 'expired': expire_requests(now, batch_size, schedule)}
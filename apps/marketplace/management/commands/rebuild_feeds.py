@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.marketplace.feed import prune_feeds, rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Reconstruit le fil des demandes de chaque prof (ou purge seulement les demandes inactives)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true', help="Supprime seulement les lignes des demandes inactives")
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            removed = prune_feeds()
+            self.stdout.write(self.style.SUCCESS(f"✅ {removed} ligne(s) de fil supprimée(s)."))
+            return
+        self.stdout.write("🚀 Reconstruction des fils des professeurs...")
+        total = rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} ligne(s) de fil créée(s)."))
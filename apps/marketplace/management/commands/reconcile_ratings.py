@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.marketplace.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = "Recalcule les notes dénormalisées des professeurs à partir des avis"
+
+    def handle(self, *args, **options):
+        self.stdout.write("🚀 Vérification des notes des professeurs...")
+        fixed = reconcile_ratings()
+        if fixed:
+            self.stdout.write(self.style.WARNING(f"⚠️ {fixed} profil(s) corrigé(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Aucune dérive détectée."))
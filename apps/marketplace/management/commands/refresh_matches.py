@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.marketplace.matching import TOP_K, match_pending_requests, refresh_all_matches
+from apps.marketplace.models import CourseRequest
+
+
+class Command(BaseCommand):
+    help = "Recalcule les suggestions Prof <-> Demande (moteur de matching)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--new', action='store_true', help="Mode incrémental : uniquement les demandes en file (créées ou modifiées)")
+        parser.add_argument('--top', type=int, default=TOP_K, help="Nombre de suggestions conservées par prof et par demande")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['new']:
+            pending = CourseRequest.objects.filter(status='active', match_queued_at__isnull=False).count()
+            self.stdout.write(f"🚀 Matching incrémental de {pending} demande(s) en file...")
+            count = match_pending_requests(options['top'])
+        else:
+            self.stdout.write("🚀 Recalcul complet des suggestions...")
+            count = refresh_all_matches(options['top'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ {count} suggestions enregistrées en {elapsed:.1f}s."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Country
+from apps.marketplace.scoring import requalify_country
+
+
+class Command(BaseCommand):
+    help = "Re-qualifie les demandes de cours selon la configuration actuelle des pays"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', help="Code ISO du pays (par défaut : tous les pays)")
+
+    def handle(self, *args, **options):
+        countries = Country.objects.all()
+        if options['country']:
+            countries = countries.filter(code=options['country'].upper())
+            if not countries:
+                raise CommandError(f"Pays inconnu : {options['country']}")
+
+        for country in countries:
+            self.stdout.write(f"🚀 {country.name} (seuil {country.min_budget_threshold} {country.currency_symbol})...")
+            changes = requalify_country(country)
+            for (old, new), count in sorted(changes.items(), key=lambda item: -item[1]):
+                self.stdout.write(f"  - {old or '(vide)'} → {new} : {count}")
+            self.stdout.write(self.style.SUCCESS(f"✅ {sum(changes.values())} lead(s) ont changé de classe."))
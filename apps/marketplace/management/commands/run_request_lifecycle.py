@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.marketplace.lifecycle import LIFECYCLE_BATCH_SIZE, run_lifecycle
+from apps.marketplace.matching import match_pending_requests
+
+
+class Command(BaseCommand):
+    help = "Planificateur des demandes : suggestions en file (matching), relances (relance_days) puis expiration"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Un seul passage puis sortie (cron)")
+        parser.add_argument('--interval', type=int, default=60, help="Secondes entre deux passages (défaut : 60)")
+        parser.add_argument('--batch-size', type=int, default=LIFECYCLE_BATCH_SIZE, help="Demandes lues par lot")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self._run(options['batch_size'], verbose=True)
+            return
+
+        self.stdout.write(f"🚀 Planificateur lancé (passage toutes les {options['interval']}s, Ctrl+C pour arrêter)...")
+        try:
+            while True:
+                started = time.monotonic()
+                close_old_connections()
+                self._run(options['batch_size'])
+                time.sleep(max(0, options['interval'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write("👋 Planificateur arrêté.")
+
+    def _run(self, batch_size, verbose=False):
+        matches = match_pending_requests()
+        result = run_lifecycle(batch_size=batch_size)
+        if verbose or matches or result['reminders'] or result['expired']:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {matches} suggestion(s), {result['reminders']} relance(s) en file, "
+                f"{result['expired']} demande(s) expirée(s)."
+            ))
@@ -0,0 +1,360 @@
+"""
+Moteur de matching Prof <-> Demande de cours.
+
+Profs validés et demandes actives sont encodés en matrices NumPy, puis toutes
+les paires sont notées par blocs de demandes (une opération vectorisée par bloc) :
+
+- recouvrement des matières (part des matières demandées que le prof enseigne) ;
+- niveau de l'élève enseigné par le prof ;
+- même ville / même quartier ;
+- modalité compatible : cours en ligne des deux côtés, ou cours à domicile dans la même ville ;
+- note du prof (score bayésien) et qualification du lead.
+
+Une paire sans matière commune ou sans modalité compatible est exclue.
+On conserve les TOP_K meilleures demandes de chaque prof et les TOP_K meilleurs
+profs de chaque demande (table CourseMatch).
+
+Une demande créée ou modifiée n'est pas notée dans la requête du parent : elle est mise
+en file (CourseRequest.match_queued_at) et match_pending_requests() la traite au passage
+suivant du planificateur (run_request_lifecycle) ou de refresh_matches --new.
+"""
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from apps.core.fulltext import normalize_text
+from apps.education.models import Level, Subject
+from apps.profiles.models import TutorProfile
+from . import scoring
+from .models import CourseMatch, CourseRequest
+
+TOP_K = 20
+CHUNK_SIZE = 256          # Nombre de demandes notées par passe (mémoire ~ CHUNK_SIZE x nb profs)
+THRESHOLD_BATCH_SIZE = 500  # Profs par lecture des seuils (liste IN bornée)
+MATCHING_BATCH_SIZE = 1000  # Demandes en file traitées par appel à match_requests
+TUTOR_MATRIX_TTL = 300    # Secondes de validité du cache des profs (mode incrémental)
+
+WEIGHT_SUBJECTS = 4.0
+WEIGHT_LEVEL = 2.0
+WEIGHT_CITY = 1.0
+WEIGHT_QUARTIER = 1.5
+WEIGHT_RATING = 1.0
+WEIGHT_QUALIFICATION = 1.0
+
+QUALIFICATION_WEIGHTS = {
+    scoring.STRONG: 1.0,
+    scoring.LUKEWARM: 0.5,
+}
+
+# Une paire valide a au moins une matière commune, donc un score > 0
+NO_MATCH = 0.0
+
+_tutor_matrix_cache = {'built_at': 0.0, 'matrix': None}
+
+
+class Vocabulary:
+    """ Associe des valeurs (ids, quartiers normalisés) à des colonnes 0..n-1. """
+
+    def __init__(self, values=()):
+        self.index = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        return self.index.setdefault(value, len(self.index))
+
+    def get(self, value):
+        return self.index.get(value, -1)
+
+    def __len__(self):
+        return len(self.index)
+
+
+def _quartier_key(quartier):
+    return ' '.join(normalize_text(quartier).split())
+
+
+def _multi_hot(row_index, pairs, vocabulary, n_rows):
+    """ Matrice booléenne (n_rows x len(vocabulary)) à partir de paires (id objet, id valeur). """
+    matrix = np.zeros((n_rows, len(vocabulary)), dtype=np.float32)
+    rows, cols = [], []
+    for obj_id, value_id in pairs:
+        col = vocabulary.get(value_id)
+        if obj_id in row_index and col >= 0:
+            rows.append(row_index[obj_id])
+            cols.append(col)
+    matrix[rows, cols] = 1.0
+    return matrix
+
+
+class TutorMatrix:
+    def __init__(self, subjects_vocab, levels_vocab, quartiers_vocab):
+        self.vocabularies = (subjects_vocab, levels_vocab, quartiers_vocab)
+        rows = list(TutorProfile.objects.filter(status='validated').values_list(
+            'id', 'city_id', 'quartier', 'is_online_class', 'is_home_class', 'rating_score',
+        ))
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        row_index = {pk: i for i, pk in enumerate(self.ids.tolist())}
+        n = len(rows)
+
+        self.city = np.array([r[1] if r[1] is not None else -1 for r in rows], dtype=np.int64)
+        self.quartier = np.array([quartiers_vocab.add(_quartier_key(r[2])) if r[2] else -1 for r in rows], dtype=np.int64)
+        self.online = np.array([r[3] for r in rows], dtype=bool)
+        self.home = np.array([r[4] for r in rows], dtype=bool)
+        self.weighted_rating = np.array([r[5] for r in rows], dtype=np.float32) * np.float32(WEIGHT_RATING / 5.0)
+
+        # Stockées transposées (valeurs x profs) : une ligne par matière / niveau, contiguë en mémoire
+        subjects = TutorProfile.subjects.through.objects.filter(tutorprofile__status='validated')
+        levels = TutorProfile.levels.through.objects.filter(tutorprofile__status='validated')
+        self.subjects_t = np.ascontiguousarray(
+            _multi_hot(row_index, subjects.values_list('tutorprofile_id', 'subject_id'), subjects_vocab, n).T
+        )
+        self.levels_t = np.ascontiguousarray(
+            _multi_hot(row_index, levels.values_list('tutorprofile_id', 'level_id'), levels_vocab, n).T
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class RequestMatrix:
+    def __init__(self, queryset, subjects_vocab, levels_vocab, quartiers_vocab):
+        rows = list(queryset.values_list('id', 'level_id', 'city_id', 'quartier', 'is_online', 'qualification'))
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        row_index = {pk: i for i, pk in enumerate(self.ids.tolist())}
+
+        self.level = np.array([levels_vocab.get(r[1]) for r in rows], dtype=np.int64)
+        self.city = np.array([r[2] if r[2] is not None else -1 for r in rows], dtype=np.int64)
+        self.quartier = np.array([quartiers_vocab.get(_quartier_key(r[3])) if r[3] else -1 for r in rows], dtype=np.int64)
+        self.online = np.array([r[4] for r in rows], dtype=bool)
+        self.weighted_qualification = np.array(
+            [WEIGHT_QUALIFICATION * QUALIFICATION_WEIGHTS.get(r[5], 0.0) for r in rows], dtype=np.float32,
+        )
+
+        # Sous-requête plutôt qu'une liste d'ids (recalcul complet : toutes les demandes actives)
+        pairs = CourseRequest.subjects.through.objects.filter(courserequest__in=queryset.values('id'))
+        self.subjects = _multi_hot(row_index, pairs.values_list('courserequest_id', 'subject_id'), subjects_vocab, len(rows))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _vocabularies():
+    subjects = Vocabulary(Subject.objects.values_list('id', flat=True))
+    levels = Vocabulary(Level.objects.values_list('id', flat=True))
+    return subjects, levels, Vocabulary()
+
+
+def score_chunk(tutors, requests, start, stop):
+    """
+    Matrice des scores (demandes[start:stop] x profs). NO_MATCH pour les paires exclues.
+    Tout est calculé en float32 et en place pour limiter les copies (bloc de ~13M cellules) ;
+    les masques booléens sont appliqués par multiplication, bien plus rapide que where=.
+    """
+    req_subjects = requests.subjects[start:stop]
+    wanted = np.maximum(req_subjects.sum(axis=1, keepdims=True), 1.0)
+    overlap = req_subjects @ tutors.subjects_t
+    valid = overlap > 0
+    score = overlap
+    score *= WEIGHT_SUBJECTS / wanted
+
+    # Niveau de l'élève : lignes de la matrice niveaux x profs
+    # (niveau non renseigné sur la demande : ni bonus complet ni pénalité, 0,5)
+    req_level = requests.level[start:stop]
+    if tutors.levels_t.shape[0]:
+        level_ok = tutors.levels_t[np.maximum(req_level, 0)]
+    else:
+        level_ok = np.zeros_like(score)
+    level_ok[req_level < 0] = 0.5
+    level_ok *= WEIGHT_LEVEL
+    score += level_ok
+
+    req_city = requests.city[start:stop, None]
+    same_city = (req_city == tutors.city[None, :]) & (req_city >= 0)
+    score += same_city.view(np.uint8) * np.float32(WEIGHT_CITY)
+
+    req_quartier = requests.quartier[start:stop, None]
+    same_quartier = same_city & (req_quartier == tutors.quartier[None, :]) & (req_quartier >= 0)
+    score += same_quartier.view(np.uint8) * np.float32(WEIGHT_QUARTIER)
+
+    score += tutors.weighted_rating[None, :]
+    score += requests.weighted_qualification[start:stop, None]
+
+    # Modalité : en ligne des deux côtés, ou à domicile dans la même ville
+    valid &= (requests.online[start:stop, None] & tutors.online[None, :]) | (tutors.home[None, :] & same_city)
+    score *= valid.view(np.uint8)  # Paires exclues -> 0 (NO_MATCH)
+    return score
+
+
+def _top_k(scores, k):
+    """ Indices des k meilleures colonnes de chaque ligne (non triés). """
+    if scores.shape[1] <= k:
+        return np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def compute_matches(tutors, requests, k=TOP_K, per_tutor=True):
+    """
+    Note toutes les paires et retourne {(tutor_id, request_id): score}
+    pour l'union des top-k par demande et (si per_tutor) des top-k par prof.
+    """
+    pairs = {}
+    n_tutors = len(tutors)
+    if not n_tutors or not len(requests):
+        return pairs
+
+    # Meilleures demandes de chaque prof, fusionnées bloc après bloc
+    best_scores = np.full((n_tutors, k), NO_MATCH, dtype=np.float32)
+    best_requests = np.zeros((n_tutors, k), dtype=np.int64)
+    kth_best = np.full(n_tutors, NO_MATCH, dtype=np.float32)
+
+    for start in range(0, len(requests), CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, len(requests))
+        scores = score_chunk(tutors, requests, start, stop)
+
+        # 1. Top-k profs de chaque demande du bloc
+        cols = _top_k(scores, k)
+        top = np.take_along_axis(scores, cols, axis=1)
+        r_idx, c_idx = np.nonzero(top > NO_MATCH)
+        pairs.update(zip(
+            zip(tutors.ids[cols[r_idx, c_idx]].tolist(), requests.ids[start + r_idx].tolist()),
+            top[r_idx, c_idx].tolist(),
+        ))
+
+        # 2. Top-k demandes de chaque prof : on ne refusionne que les profs
+        #    dont au moins une demande du bloc bat leur k-ième meilleure
+        if per_tutor:
+            improved = np.nonzero(scores.max(axis=0) > kth_best)[0]
+            if not len(improved):
+                continue
+            merged_scores = np.concatenate([best_scores[improved], scores[:, improved].T], axis=1)
+            merged_requests = np.concatenate(
+                [best_requests[improved], np.broadcast_to(requests.ids[start:stop], (len(improved), stop - start))],
+                axis=1,
+            )
+            keep = _top_k(merged_scores, k)
+            best_scores[improved] = np.take_along_axis(merged_scores, keep, axis=1)
+            best_requests[improved] = np.take_along_axis(merged_requests, keep, axis=1)
+            kth_best[improved] = best_scores[improved].min(axis=1)
+
+    if per_tutor:
+        t_idx, c_idx = np.nonzero(best_scores > NO_MATCH)
+        pairs.update(zip(
+            zip(tutors.ids[t_idx].tolist(), best_requests[t_idx, c_idx].tolist()),
+            best_scores[t_idx, c_idx].tolist(),
+        ))
+    return pairs
+
+
+def _save_pairs(pairs):
+    CourseMatch.objects.bulk_create(
+        [CourseMatch(tutor_id=t, request_id=r, score=s) for (t, r), s in pairs.items()],
+        batch_size=2000,
+    )
+
+
+def refresh_all_matches(k=TOP_K):
+    """
+    Recalcule toutes les suggestions (profs validés x demandes actives).
+    Retourne le nombre de paires enregistrées.
+    """
+    started = timezone.now()
+    tutors = TutorMatrix(*_vocabularies())
+    requests = RequestMatrix(CourseRequest.objects.filter(status='active'), *tutors.vocabularies)
+    pairs = compute_matches(tutors, requests, k)
+
+    with transaction.atomic():
+        CourseMatch.objects.all().delete()
+        _save_pairs(pairs)
+        # Tout est à jour : la file est vidée (sauf demandes modifiées pendant le calcul)
+        CourseRequest.objects.filter(match_queued_at__lte=started).update(match_queued_at=None)
+
+    # Le cache du mode incrémental repart des données fraîches
+    _tutor_matrix_cache['matrix'] = tutors
+    _tutor_matrix_cache['built_at'] = time.monotonic()
+    return len(pairs)
+
+
+def _cached_tutor_matrix():
+    cache = _tutor_matrix_cache
+    if cache['matrix'] is None or time.monotonic() - cache['built_at'] > TUTOR_MATRIX_TTL:
+        cache['matrix'] = TutorMatrix(*_vocabularies())
+        cache['built_at'] = time.monotonic()
+    return cache['matrix']
+
+
+def _thresholds(tutor_ids, k):
+    """ Score à battre pour entrer dans les suggestions de chaque prof (NO_MATCH s'il en a moins de k). """
+    thresholds = {}
+    for start in range(0, len(tutor_ids), THRESHOLD_BATCH_SIZE):
+        rows = (CourseMatch.objects.filter(tutor_id__in=tutor_ids[start:start + THRESHOLD_BATCH_SIZE])
+                .values('tutor_id').annotate(n=Count('id'), lowest=Min('score')).order_by())
+        for row in rows:
+            thresholds[row['tutor_id']] = row['lowest'] if row['n'] >= k else NO_MATCH
+    return np.array([thresholds.get(pk, NO_MATCH) for pk in tutor_ids], dtype=np.float32)
+
+
+def match_requests(request_ids, k=TOP_K):
+    """
+    Mode incrémental : note uniquement les demandes données contre tous les profs.
+    - les top-k profs de chaque demande remplacent ses anciennes suggestions ;
+    - une paire est aussi ajoutée côté prof si elle bat la plus faible suggestion
+      qu'il a déjà (ou s'il en a moins de k). Le surplus éventuel est nettoyé
+      par le prochain recalcul complet ; la lecture se fait de toute façon
+      par score décroissant limitée à k.
+    Seuls les seuils des profs candidats (au moins une paire valide) sont lus.
+    """
+    tutors = _cached_tutor_matrix()
+    requests = RequestMatrix(
+        CourseRequest.objects.filter(pk__in=request_ids, status='active'), *tutors.vocabularies,
+    )
+    pairs = compute_matches(tutors, requests, k, per_tutor=False)
+
+    if len(requests) and len(tutors):
+        for start in range(0, len(requests), CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, len(requests))
+            scores = score_chunk(tutors, requests, start, stop)
+            candidates = np.nonzero((scores > NO_MATCH).any(axis=0))[0]
+            if not len(candidates):
+                continue
+            scores = scores[:, candidates]
+            threshold = _thresholds(tutors.ids[candidates].tolist(), k)
+            r_idx, c_idx = np.nonzero(scores > threshold[None, :])
+            pairs.update(zip(
+                zip(tutors.ids[candidates[c_idx]].tolist(), requests.ids[start + r_idx].tolist()),
+                scores[r_idx, c_idx].tolist(),
+            ))
+
+    with transaction.atomic():
+        CourseMatch.objects.filter(request_id__in=request_ids).delete()
+        _save_pairs(pairs)
+    return len(pairs)
+
+
+def queue_matching(course_request):
+    """ Demande créée / modifiée (à sauvegarder ensuite) : ses suggestions seront recalculées. """
+    course_request.match_queued_at = timezone.now()
+
+
+def match_pending_requests(k=TOP_K, batch_size=MATCHING_BATCH_SIZE):
+    """
+    Traite la file : demandes actives en attente de suggestions, par lots.
+    Une demande remise en file pendant le calcul (match_queued_at plus récent
+    que le début du lot) y reste pour le passage suivant.
+    Retourne le nombre de paires enregistrées.
+    """
+    pending = CourseRequest.objects.filter(match_queued_at__isnull=False, status='active').order_by('match_queued_at', 'id')
+    count = 0
+    while True:
+        started = timezone.now()
+        request_ids = list(pending.values_list('id', flat=True)[:batch_size])
+        if not request_ids:
+            break
+        count += match_requests(request_ids, k)
+        CourseRequest.objects.filter(pk__in=request_ids, match_queued_at__lte=started).update(match_queued_at=None)
+        if len(request_ids) < batch_size:
+            break
+    return count
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_country_options_country_casier_delay_weeks_and_more'),
+        ('education', '0001_initial'),
+        ('marketplace', '0003_alter_courserequest_options_alter_review_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courserequest',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='request_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courserequest',
+            index=models.Index(fields=['status', 'city', '-created_at', '-id'], name='request_status_city_idx'),
+        ),
+    ]
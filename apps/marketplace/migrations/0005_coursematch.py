@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0004_courserequest_request_status_created_idx_and_more'),
+        ('profiles', '0008_tutor_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Score')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tutor_matches', to='marketplace.courserequest', verbose_name='Demande')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_matches', to='profiles.tutorprofile', verbose_name='Professeur')),
+            ],
+            options={
+                'verbose_name': 'Suggestion (matching)',
+                'verbose_name_plural': 'Suggestions (matching)',
+                'indexes': [models.Index(fields=['tutor', '-score'], name='match_tutor_score_idx'), models.Index(fields=['request', '-score'], name='match_request_score_idx')],
+                'unique_together': {('tutor', 'request')},
+            },
+        ),
+    ]
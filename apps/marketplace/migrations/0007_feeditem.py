@@ -0,0 +1,53 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def fill_feeds(apps, schema_editor):
+    # Version "historique" de feed.rebuild_feeds pour les demandes déjà publiées
+    CourseRequest = apps.get_model('marketplace', 'CourseRequest')
+    FeedItem = apps.get_model('marketplace', 'FeedItem')
+    TutorSearchEntry = apps.get_model('profiles', 'TutorSearchEntry')
+    for course_request in CourseRequest.objects.filter(status='active').prefetch_related('subjects'):
+        subject_ids = [subject.pk for subject in course_request.subjects.all()]
+        if not subject_ids:
+            continue
+        where = Q(city_id=course_request.city_id) if course_request.city_id else Q(pk__in=[])
+        if course_request.is_online:
+            where |= Q(tutor__is_online_class=True)
+        tutor_ids = set(TutorSearchEntry.objects.filter(
+            where, subject_id__in=subject_ids, level_id=course_request.level_id,
+        ).values_list('tutor_id', flat=True))
+        FeedItem.objects.bulk_create(
+            [FeedItem(tutor_id=pk, request_id=course_request.pk, created_at=course_request.created_at) for pk in tutor_ids],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0006_courserequest_quartier_ref'),
+        ('profiles', '0010_tutor_quartier_ref'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='marketplace.courserequest')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='profiles.tutorprofile')),
+            ],
+            options={
+                'verbose_name': 'Élément du fil prof',
+                'verbose_name_plural': 'Fil des profs',
+                'indexes': [models.Index(fields=['tutor', '-created_at', '-request'], name='feed_tutor_created_idx')],
+                'unique_together': {('tutor', 'request')},
+            },
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
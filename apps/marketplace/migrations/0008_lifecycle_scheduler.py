@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0007_feeditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_created_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Point de reprise (planificateur)',
+                'verbose_name_plural': 'Points de reprise (planificateur)',
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField(verbose_name='Jour de relance')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Envoyée le')),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='marketplace.courserequest', verbose_name='Demande')),
+            ],
+            options={
+                'verbose_name': 'Relance de demande',
+                'verbose_name_plural': 'Relances de demandes',
+                'indexes': [models.Index(fields=['sent_at', 'created_at'], name='reminder_pending_idx')],
+                'unique_together': {('request', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:27
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def activated_at_from_created_at(apps, schema_editor):
+    CourseRequest = apps.get_model('marketplace', 'CourseRequest')
+    CourseRequest.objects.update(activated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0008_lifecycle_scheduler'),
+    ]
+
+    operations = [
+        # Les positions déjà atteintes restent valables : activated_at part de created_at
+        migrations.RenameField(
+            model_name='schedulercheckpoint',
+            old_name='last_created_at',
+            new_name='last_activated_at',
+        ),
+        migrations.AddField(
+            model_name='courserequest',
+            name='activated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Active depuis'),
+        ),
+        migrations.RunPython(activated_at_from_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='courserequest',
+            index=models.Index(fields=['status', 'activated_at', 'id'], name='request_status_activated_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def queue_unmatched_requests(apps, schema_editor):
+    # Seules les demandes actives sans suggestion restent en file
+    CourseRequest = apps.get_model('marketplace', 'CourseRequest')
+    (CourseRequest.objects.exclude(status='active', tutor_matches__isnull=True)
+     .update(match_queued_at=None))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0009_request_activated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courserequest',
+            name='match_queued_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, editable=False, null=True, verbose_name='Suggestions en attente depuis'),
+        ),
+        migrations.RunPython(queue_unmatched_requests, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='courserequest',
+            index=models.Index(fields=['match_queued_at', 'id'], name='request_match_queue_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.education.models import Subject, Level
 from apps.core.models import City
@@ -52,6 +53,10 @@ class CourseRequest(models.Model):
     # --- LOGISTIQUE & LOCALISATION ---
     city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, verbose_name="Ville")
     quartier = models.CharField(max_length=100, verbose_name="Quartier précis")
+    quartier_ref = models.ForeignKey(
+        'core.Quartier', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='course_requests', verbose_name="Quartier (référentiel)",
+    )
     frequency = models.CharField(max_length=100, verbose_name="Fréquence (ex: 2x par semaine)")
     is_online = models.BooleanField(default=False, verbose_name="Accepte les cours en ligne (Visio)")
     
@@ -68,9 +73,25 @@ class CourseRequest(models.Model):
     # --- GESTION ---
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name="Statut")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    # Début du cycle relances / expiration (marketplace/lifecycle.py) : la création,
+    # puis chaque réactivation par le parent
+    activated_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Active depuis")
+    # File du moteur de matching (marketplace/matching.py) : non nul tant que les
+    # suggestions de profs restent à (re)calculer après une création ou une modification
+    match_queued_at = models.DateTimeField(
+        default=timezone.now, null=True, blank=True, editable=False, verbose_name="Suggestions en attente depuis",
+    )
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pagination par curseur de la place de marché (status + (created_at, id))
+            models.Index(fields=['status', '-created_at', '-id'], name='request_status_created_idx'),
+            models.Index(fields=['status', 'city', '-created_at', '-id'], name='request_status_city_idx'),
+            # Planificateur : demandes actives devenues "dues" (relances, expiration)
+            models.Index(fields=['status', 'activated_at', 'id'], name='request_status_activated_idx'),
+            models.Index(fields=['match_queued_at', 'id'], name='request_match_queue_idx'),
+        ]
         verbose_name = "Demande de cours"
         verbose_name_plural = "Demandes de cours"
 
@@ -78,6 +99,26 @@ class CourseRequest(models.Model):
         return f"Demande {self.parent.username} - {self.level} ({self.get_status_display()})"
 
 
+class FeedItem(models.Model):
+    """
+    Fil personnalisé d'un prof (fan-out à l'écriture) : une ligne par demande active
+    qui correspond à ses matières, niveaux et ville. Rempli par marketplace/feed.py
+    quand une demande est créée ou modifiée, purgé quand elle n'est plus active.
+    """
+    tutor = models.ForeignKey('profiles.TutorProfile', on_delete=models.CASCADE, related_name='feed_items')
+    request = models.ForeignKey(CourseRequest, on_delete=models.CASCADE, related_name='feed_items')
+    # Copie de request.created_at : le fil se lit entièrement sur l'index (tutor, -created_at)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('tutor', 'request')
+        indexes = [
+            models.Index(fields=['tutor', '-created_at', '-request'], name='feed_tutor_created_idx'),
+        ]
+        verbose_name = "Élément du fil prof"
+        verbose_name_plural = "Fil des profs"
+
+
 class Review(models.Model):
     """
     Avis laissé par un parent sur un professeur après avoir débloqué le contact.
@@ -99,4 +140,69 @@ class Review(models.Model):
         verbose_name_plural = "Avis & Notations"
 
     def __str__(self):
-        return f"Note {self.rating}/5 pour {self.tutor.user.username} par {self.author.username}"
\ No newline at end of file
+        return f"Note {self.rating}/5 pour {self.tutor.user.username} par {self.author.username}"
+
+
+class CourseMatch(models.Model):
+    """
+    Appariement Prof <-> Demande calculé par le moteur de matching (marketplace/matching.py).
+    La table contient l'union des K meilleures demandes de chaque prof
+    et des K meilleurs profs de chaque demande.
+    """
+    tutor = models.ForeignKey('profiles.TutorProfile', on_delete=models.CASCADE, related_name='request_matches', verbose_name="Professeur")
+    request = models.ForeignKey(CourseRequest, on_delete=models.CASCADE, related_name='tutor_matches', verbose_name="Demande")
+    score = models.FloatField(verbose_name="Score")
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('tutor', 'request')
+        indexes = [
+            models.Index(fields=['tutor', '-score'], name='match_tutor_score_idx'),
+            models.Index(fields=['request', '-score'], name='match_request_score_idx'),
+        ]
+        verbose_name = "Suggestion (matching)"
+        verbose_name_plural = "Suggestions (matching)"
+
+    def __str__(self):
+        return f"{self.tutor_id} <-> {self.request_id} ({self.score:.2f})"
+
+
+class RequestReminder(models.Model):
+    """
+    Relance d'une demande restée active (Country.relance_days, CDC Section 13).
+    File d'envoi : une ligne par (demande, jour de relance), créée par marketplace/lifecycle.py,
+    sent_at renseigné par l'expéditeur une fois la notification partie.
+    """
+    request = models.ForeignKey(CourseRequest, on_delete=models.CASCADE, related_name='reminders', verbose_name="Demande")
+    day = models.PositiveSmallIntegerField(verbose_name="Jour de relance")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Envoyée le")
+
+    class Meta:
+        unique_together = ('request', 'day')
+        indexes = [
+            models.Index(fields=['sent_at', 'created_at'], name='reminder_pending_idx'),
+        ]
+        verbose_name = "Relance de demande"
+        verbose_name_plural = "Relances de demandes"
+
+    def __str__(self):
+        return f"Relance J+{self.day} - demande {self.request_id}"
+
+
+class SchedulerCheckpoint(models.Model):
+    """
+    Position atteinte par une tâche du planificateur (marketplace/lifecycle.py) :
+    dernière demande traitée, dans l'ordre (activated_at, id) de l'index de statut.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_activated_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Point de reprise (planificateur)"
+        verbose_name_plural = "Points de reprise (planificateur)"
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_activated_at} / {self.last_id}"
@@ -0,0 +1,62 @@
+"""
+Agrégats de notation dénormalisés sur TutorProfile (avg_rating, review_count, rating_score).
+"""
+from django.db import transaction
+from django.db.models import Avg, Count, F
+
+from apps.profiles.models import TutorProfile, TutorSearchEntry
+from .models import Review
+
+# Moyenne bayésienne : chaque prof part avec RATING_PRIOR_WEIGHT avis "virtuels"
+# à RATING_PRIOR_MEAN, ce qui évite qu'un seul 5/5 écrase les profs très notés.
+RATING_PRIOR_MEAN = 3.5
+RATING_PRIOR_WEIGHT = 5
+
+
+def bayesian_score(avg_rating, review_count):
+    total = avg_rating * review_count + RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT
+    return round(total / (review_count + RATING_PRIOR_WEIGHT), 4)
+
+
+def _save_rating(tutor_id, avg_rating, review_count):
+    score = bayesian_score(avg_rating, review_count)
+    # update() plutôt que save() : pas besoin de recalculer tout l'index de l'annuaire
+    TutorProfile.objects.filter(pk=tutor_id).update(
+        avg_rating=avg_rating, review_count=review_count, rating_score=score,
+        card_version=F('card_version') + 1,
+    )
+    TutorSearchEntry.objects.filter(tutor_id=tutor_id).update(rating_score=score)
+
+
+def refresh_tutor_rating(tutor_id):
+    """
+    Recalcule les agrégats d'un prof après création/modification/suppression d'un avis.
+    La ligne du prof est verrouillée pour que deux avis simultanés ne s'écrasent pas.
+    """
+    with transaction.atomic():
+        locked = list(TutorProfile.objects.select_for_update().filter(pk=tutor_id).values_list('pk', flat=True))
+        if not locked:
+            return  # Prof en cours de suppression
+        stats = Review.objects.filter(tutor_id=tutor_id).aggregate(avg=Avg('rating'), count=Count('id'))
+        _save_rating(tutor_id, stats['avg'] or 0, stats['count'])
+
+
+def reconcile_ratings():
+    """
+    Compare les agrégats stockés avec les avis réels et corrige les écarts.
+    Retourne le nombre de profs corrigés.
+    """
+    actual = {
+        row['tutor_id']: (row['avg'], row['count'])
+        for row in Review.objects.values('tutor_id').annotate(avg=Avg('rating'), count=Count('id')).order_by()
+    }
+    fixed = 0
+    stored = TutorProfile.objects.values_list('pk', 'avg_rating', 'review_count', 'rating_score')
+    for tutor_id, avg_rating, review_count, rating_score in stored.iterator():
+        avg, count = actual.get(tutor_id, (0, 0))
+        if (review_count != count or abs(avg_rating - avg) > 1e-9
+                or rating_score != bayesian_score(avg, count)):
+            with transaction.atomic():
+                _save_rating(tutor_id, avg, count)
+            fixed += 1
+    return fixed
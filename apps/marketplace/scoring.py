@@ -0,0 +1,80 @@
+"""
+Qualification des leads (CDC Section 2.1.3), partagée par create_request et le re-scoring en masse.
+
+Le seuil de budget vient de la configuration du pays de la demande
+(Country.min_budget_threshold) : une tranche est "suffisante" si son plancher l'atteint.
+"""
+from collections import Counter
+
+from apps.core.models import City
+from .models import CourseRequest
+
+STRONG = "Intention Forte"
+LUKEWARM = "Intention Tiède"
+LIMITED = "Budget Limité / Autre"
+
+DEFAULT_MIN_BUDGET = 30000
+REQUALIFY_CHUNK_SIZE = 1000
+
+# Plancher (F CFA) de chaque tranche de CourseRequest.BUDGET_CHOICES
+BUDGET_FLOORS = {
+    'low': 0,
+    'medium_low': 20000,
+    'standard': 30000,
+    'high': 50000,
+    'premium': 80000,
+}
+STRONG_START = ('asap', '1-4weeks')
+
+
+def qualify(budget_range, start_time, intention, min_budget=DEFAULT_MIN_BUDGET):
+    """ Classe d'un lead à partir de ses réponses (valeurs brutes, aucun accès base). """
+    strong_budget = BUDGET_FLOORS.get(budget_range, 0) >= min_budget
+    if intention == 'start' and start_time in STRONG_START and strong_budget:
+        return STRONG
+    if (intention == 'info' or start_time == 'later') and strong_budget:
+        return LUKEWARM
+    return LIMITED
+
+
+def min_budget_for_city(city_id):
+    """ Seuil du pays de la ville (défaut du CDC si la demande n'a pas de ville). """
+    if city_id is None:
+        return DEFAULT_MIN_BUDGET
+    threshold = City.objects.filter(pk=city_id).values_list('country__min_budget_threshold', flat=True).first()
+    return DEFAULT_MIN_BUDGET if threshold is None else threshold
+
+
+def qualify_request(course_request):
+    return qualify(
+        course_request.budget_range, course_request.start_time, course_request.intention,
+        min_budget_for_city(course_request.city_id),
+    )
+
+
+def requalify_country(country, chunk_size=REQUALIFY_CHUNK_SIZE):
+    """
+    Re-qualifie toutes les demandes d'un pays après modification de sa configuration.
+    Lecture en values_list par tranches d'id (pas d'instances complètes), écriture
+    par bulk_update de la seule colonne qualification, uniquement pour les lignes qui changent.
+    Retourne un Counter {(ancienne classe, nouvelle classe): nombre}.
+    """
+    changes = Counter()
+    rows = (CourseRequest.objects.filter(city__country=country)
+            .values_list('id', 'budget_range', 'start_time', 'intention', 'qualification')
+            .order_by('id'))
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+
+        updated = []
+        for pk, budget_range, start_time, intention, old in chunk:
+            new = qualify(budget_range, start_time, intention, country.min_budget_threshold)
+            if new != old:
+                updated.append(CourseRequest(pk=pk, qualification=new))
+                changes[(old, new)] += 1
+        CourseRequest.objects.bulk_update(updated, ['qualification'])
+    return changes
@@ -0,0 +1,26 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.geo import resolve_quartier
+from .feed import prune_request
+from .models import CourseRequest, Review
+from .ratings import refresh_tutor_rating
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    refresh_tutor_rating(instance.tutor_id)
+
+
+@receiver(pre_save, sender=CourseRequest)
+def request_locate(sender, instance, update_fields, **kwargs):
+    if update_fields is None or {'city', 'quartier'} & set(update_fields):
+        instance.quartier_ref_id = resolve_quartier(instance.city_id, instance.quartier)
+
+
+@receiver(post_save, sender=CourseRequest)
+def request_saved(sender, instance, created, **kwargs):
+    # Demande conclue / expirée / abandonnée : elle sort du fil des profs
+    if not created and instance.status != 'active':
+        prune_request(instance.pk)
@@ -1,3 +1,277 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.models import City, Country
+from apps.core.query_inspector import QueryBudgetTestMixin
+from apps.education.models import Level, Subject
+from apps.profiles.models import TutorProfile, TutorSearchEntry
+from apps.profiles.search_index import reindex_tutors
+
+from .feed import fan_out_request
+from .lifecycle import reactivate_request, run_lifecycle
+from .models import CourseRequest, FeedItem, RequestReminder, SchedulerCheckpoint
+from .ratings import _save_rating
+from .scoring import LIMITED, LUKEWARM, STRONG, qualify_request, requalify_country
+from .views import _tutor_directory_page
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """ Budgets de requêtes (settings.QUERY_BUDGETS) des pages listes, avec assez de lignes pour voir un N+1. """
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Côte d'Ivoire", code='CI')
+        cls.city = City.objects.create(country=country, name='Abidjan')
+        cls.subject = Subject.objects.create(name='Maths')
+        cls.level = Level.objects.create(name='3ème')
+
+        tutors = []
+        for i in range(15):
+            user = User.objects.create(username=f'prof{i}', first_name=f'Prof {i}', role='tutor')
+            tutor = TutorProfile.objects.create(
+                user=user, bio='Professeur de maths', city=cls.city, quartier='Cocody', status='validated',
+            )
+            tutor.subjects.add(cls.subject)
+            tutor.levels.add(cls.level)
+            tutors.append(tutor)
+        reindex_tutors(TutorProfile.objects.all())
+        cls.tutor_user = tutors[0].user
+
+        parent = User.objects.create(username='parent')
+        for i in range(15):
+            course_request = CourseRequest.objects.create(
+                parent=parent, level=cls.level, city=cls.city, quartier='Cocody', frequency='2h / semaine',
+            )
+            course_request.subjects.add(cls.subject)
+            FeedItem.objects.create(tutor=tutors[0], request=course_request, created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()  # Cartes de l'annuaire en cache : on mesure la page "froide"
+
+    def test_tutor_list(self):
+        with self.assertQueryBudget(url_name='tutor_list'):
+            response = self.client.get(reverse('tutor_list'))
+        self.assertEqual(len(response.context['tutor_cards']), 12)
+
+    def test_tutor_list_filtered(self):
+        params = {'subject': self.subject.pk, 'level': self.level.pk, 'city': self.city.pk}
+        with self.assertQueryBudget(url_name='tutor_list'):
+            response = self.client.get(reverse('tutor_list'), params)
+        self.assertEqual(len(response.context['tutor_cards']), 12)
+
+    def test_request_list(self):
+        self.client.force_login(self.tutor_user)
+        with self.assertQueryBudget(url_name='request_list'):
+            response = self.client.get(reverse('request_list'))
+        self.assertEqual(len(response.context['requests'].items), 12)
+
+
+class DirectorySortTests(TestCase):
+    """ Tri "Mieux notés" de l'annuaire : parcours complet par curseur avec des scores ex aequo. """
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(15):
+            user = User.objects.create(username=f'prof{i}', role='tutor')
+            tutor = TutorProfile.objects.create(user=user, bio='Maths', status='validated')
+            _save_rating(tutor.pk, 3 + i % 3, 4)  # Trois scores seulement, cinq profs par score
+        reindex_tutors(TutorProfile.objects.all())
+
+    def _walk(self, params):
+        ids, cursor = [], None
+        while True:
+            page = _tutor_directory_page(RequestFactory().get('/', dict(params, cursor=cursor or '')))
+            ids += [tutor.pk for tutor in page]
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_rating_sort_with_ties(self):
+        expected = list(TutorSearchEntry.objects.filter(subject=None, level=None)
+                        .order_by('-rating_score', '-tutor_id').values_list('tutor_id', flat=True))
+        self.assertEqual(len(expected), 15)
+        self.assertEqual(self._walk({'sort': 'rating'}), expected)
+
+    def test_garbage_cursor_gives_first_page(self):
+        first = [tutor.pk for tutor in _tutor_directory_page(RequestFactory().get('/', {'sort': 'rating'}))]
+        # Curseur du tri par date ('2024-01-01|5') rejoué sur le tri par score
+        page = _tutor_directory_page(RequestFactory().get('/', {'sort': 'rating', 'cursor': 'MjAyNC0wMS0wMXw1'}))
+        self.assertEqual([tutor.pk for tutor in page], first)
+
+
+class FeedTests(TestCase):
+    """ Fil des demandes écrit à l'avance (feed.py) : fan-out et purge quand une des deux parties sort. """
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Côte d'Ivoire", code='CI')
+        cls.city = City.objects.create(country=country, name='Abidjan')
+        other_city = City.objects.create(country=country, name='Bouaké')
+        cls.subject = Subject.objects.create(name='Maths')
+        cls.level = Level.objects.create(name='3ème')
+        other_subject = Subject.objects.create(name='Anglais')
+
+        def tutor(name, city, subject, online=False):
+            user = User.objects.create(username=name, role='tutor')
+            profile = TutorProfile.objects.create(
+                user=user, bio='Prof', city=city, is_online_class=online, status='validated',
+            )
+            profile.subjects.add(subject)
+            profile.levels.add(cls.level)
+            return profile
+
+        cls.local = tutor('local', cls.city, cls.subject)
+        cls.online = tutor('en-ligne', other_city, cls.subject, online=True)
+        tutor('loin', other_city, cls.subject)
+        tutor('anglais', cls.city, other_subject)
+        reindex_tutors(TutorProfile.objects.all())
+        cls.parent = User.objects.create(username='parent')
+
+    def _request(self, **kwargs):
+        course_request = CourseRequest.objects.create(
+            parent=self.parent, level=self.level, city=self.city, quartier='Cocody', frequency='2h', **kwargs,
+        )
+        course_request.subjects.add(self.subject)
+        fan_out_request(course_request)
+        return course_request
+
+    def _feed(self, course_request):
+        return set(FeedItem.objects.filter(request=course_request).values_list('tutor_id', flat=True))
+
+    def test_fan_out(self):
+        self.assertEqual(self._feed(self._request()), {self.local.pk})
+        self.assertEqual(self._feed(self._request(is_online=True)), {self.local.pk, self.online.pk})
+
+    def test_request_closed_is_pruned(self):
+        course_request = self._request(is_online=True)
+        course_request.status = 'closed'
+        course_request.save()
+        self.assertEqual(self._feed(course_request), set())
+
+    def test_tutor_suspended_is_pruned(self):
+        course_request = self._request(is_online=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.online.status = 'suspended'
+            self.online.save()
+        self.assertEqual(self._feed(course_request), {self.local.pk})
+        self.assertFalse(FeedItem.objects.filter(tutor=self.online).exists())
+
+    def test_tutor_validated_receives_published_requests(self):
+        course_request = self._request()
+        user = User.objects.create(username='nouveau', role='tutor')
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = TutorProfile.objects.create(user=user, bio='Prof', city=self.city, status='pending')
+            newcomer.subjects.add(self.subject)
+            newcomer.levels.add(self.level)
+        self.assertNotIn(newcomer.pk, self._feed(course_request))
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer.status = 'validated'
+            newcomer.save()
+        self.assertIn(newcomer.pk, self._feed(course_request))
+
+
+class RequalifyTests(TestCase):
+    """ Qualification des leads au seuil de budget du pays, et re-qualification quand il change. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Country.objects.create(name="Côte d'Ivoire", code='CI', min_budget_threshold=30000)
+        other = Country.objects.create(name='Sénégal', code='SN', min_budget_threshold=30000)
+        cls.city = City.objects.create(country=cls.country, name='Abidjan')
+        cls.other_city = City.objects.create(country=other, name='Dakar')
+        cls.parent = User.objects.create(username='parent')
+
+    def _request(self, city, **kwargs):
+        course_request = CourseRequest(parent=self.parent, city=city, quartier='Centre', frequency='2h', **kwargs)
+        course_request.qualification = qualify_request(course_request)
+        course_request.save()
+        return course_request
+
+    def test_threshold_change_requalifies_country(self):
+        strong = self._request(self.city, budget_range='standard')
+        lukewarm = self._request(self.city, budget_range='high', intention='info')
+        elsewhere = self._request(self.other_city, budget_range='standard')
+        self.assertEqual((strong.qualification, lukewarm.qualification), (STRONG, LUKEWARM))
+
+        self.country.min_budget_threshold = 50000
+        self.country.save()
+        changes = requalify_country(self.country, chunk_size=1)
+
+        self.assertEqual(changes, {(STRONG, LIMITED): 1})
+        qualifications = dict(CourseRequest.objects.values_list('pk', 'qualification'))
+        self.assertEqual(qualifications[strong.pk], LIMITED)
+        self.assertEqual(qualifications[lukewarm.pk], LUKEWARM)
+        self.assertEqual(qualifications[elsewhere.pk], STRONG)  # Autre pays : seuil inchangé
+
+    def test_requalify_without_change_writes_nothing(self):
+        self._request(self.city, budget_range='standard')
+        with self.assertNumQueries(2):  # Une tranche lue, puis la tranche vide qui arrête la boucle
+            self.assertEqual(requalify_country(self.country), {})
+
+
+class LifecycleTests(TestCase):
+    """ Planificateur des demandes (lifecycle.py) : relances avec point de reprise, expiration par pays. """
+
+    @classmethod
+    def setUpTestData(cls):
+        short = Country.objects.create(name='Sénégal', code='SN', relance_days='3,7', request_expiry_days=10)
+        default = Country.objects.create(name="Côte d'Ivoire", code='CI')  # 3,7,10 et 30 jours
+        cls.short_city = City.objects.create(country=short, name='Dakar')
+        cls.city = City.objects.create(country=default, name='Abidjan')
+        cls.parent = User.objects.create(username='parent')
+        cls.now = timezone.now()
+
+    def _request(self, city, days_ago):
+        return CourseRequest.objects.create(
+            parent=self.parent, city=city, quartier='Centre', frequency='2h',
+            activated_at=self.now - timedelta(days=days_ago),
+        )
+
+    def _reminders(self):
+        return set(RequestReminder.objects.values_list('request_id', 'day'))
+
+    def _tutor(self):
+        user = User.objects.create(username='prof', role='tutor')
+        return TutorProfile.objects.create(user=user, bio='Prof', status='validated')
+
+    def test_reminders_resume_from_checkpoint(self):
+        first = self._request(self.city, 4)
+        self.assertEqual(run_lifecycle(self.now), {'reminders': 1, 'expired': 0})
+        self.assertEqual(SchedulerCheckpoint.objects.get(name='relance:3').last_id, first.pk)
+        # Passage suivant : rien de neuf, rien en double
+        self.assertEqual(run_lifecycle(self.now)['reminders'], 0)
+
+        second = self._request(self.city, 3.5)
+        later = self.now + timedelta(days=3)
+        self.assertEqual(run_lifecycle(later, batch_size=1)['reminders'], 2)
+        self.assertEqual(self._reminders(), {(first.pk, 3), (first.pk, 7), (second.pk, 3)})
+
+    def test_expiry_follows_country(self):
+        short = self._request(self.short_city, 11)
+        default = self._request(self.city, 11)
+        FeedItem.objects.create(tutor=self._tutor(), request=short, created_at=short.created_at)
+
+        self.assertEqual(run_lifecycle(self.now)['expired'], 1)
+        statuses = dict(CourseRequest.objects.values_list('pk', 'status'))
+        self.assertEqual((statuses[short.pk], statuses[default.pk]), ('expired', 'active'))
+        self.assertFalse(FeedItem.objects.filter(request=short).exists())
+        # Pas de relance pour la demande qui expirait au même passage
+        self.assertEqual(self._reminders(), {(default.pk, 3), (default.pk, 7), (default.pk, 10)})
+
+    def test_reactivation_restarts_cycle(self):
+        course_request = self._request(self.short_city, 11)
+        run_lifecycle(self.now)
+        course_request.refresh_from_db()
+        reactivate_request(course_request, now=self.now)
+        course_request.save()
+
+        self.assertEqual(RequestReminder.objects.filter(request=course_request).count(), 0)
+        self.assertEqual(run_lifecycle(self.now + timedelta(days=4)), {'reminders': 1, 'expired': 0})
+        self.assertEqual(run_lifecycle(self.now + timedelta(days=11))['expired'], 1)
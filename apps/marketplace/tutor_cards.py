@@ -0,0 +1,53 @@
+"""
+Cache des cartes de l'annuaire (fragment HTML par prof).
+
+La clé contient TutorProfile.card_version : toute modification visible sur la carte
+(profil, matières, nom, avis...) incrémente le compteur, l'ancienne entrée n'est
+donc plus jamais lue et expire d'elle-même. Aucune suppression explicite.
+
+Page "chaude" : une requête SQL pour les ids/versions + un get_many sur le cache.
+"""
+from django.core.cache import cache
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from apps.profiles.models import TutorProfile
+
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+CARD_TEMPLATE = 'marketplace/_tutor_card.html'
+
+# Champs suffisants pour paginer l'annuaire et construire les clés de cache
+CARD_PAGE_FIELDS = ('id', 'card_version', 'created_at', 'rating_score')
+
+
+def bump_card_versions(tutor_ids):
+    """ Invalide les cartes des profs donnés (un seul UPDATE). """
+    return TutorProfile.objects.filter(pk__in=list(tutor_ids)).update(card_version=F('card_version') + 1)
+
+
+def _card_key(tutor_id, version):
+    # La langue fait partie de la clé : les liens de la carte sont préfixés (/fr/, /en/)
+    return f'tutor_card:{tutor_id}:{version}:{get_language()}'
+
+
+def render_tutor_cards(tutors):
+    """
+    Fragments HTML des cartes, dans l'ordre de `tutors` (objets avec au moins id et card_version).
+    Seules les cartes absentes du cache sont rendues (profs rechargés en 2 requêtes).
+    """
+    keys = [_card_key(tutor.pk, tutor.card_version) for tutor in tutors]
+    cached = cache.get_many(keys)
+
+    missing = [tutor.pk for tutor, key in zip(tutors, keys) if key not in cached]
+    if missing:
+        full = TutorProfile.objects.select_related('user').prefetch_related('subjects').in_bulk(missing)
+        fresh = {}
+        for tutor, key in zip(tutors, keys):
+            if tutor.pk in full and key not in cached:
+                fresh[key] = render_to_string(CARD_TEMPLATE, {'tutor': full[tutor.pk]})
+        cache.set_many(fresh, CARD_CACHE_TIMEOUT)
+        cached.update(fresh)
+
+    return [mark_safe(cached[key]) for key in keys if key in cached]
@@ -8,8 +8,10 @@ urlpatterns = [
     
     # Côté Prof (Place de marché)
     path('espace-enseignant/demandes/', views.request_list, name='request_list'),
+    path('espace-enseignant/demandes/suite/', views.request_list_more, name='request_list_more'),
     
     # Public
     path('annuaire/', views.tutor_list, name='tutor_list'),
+    path('annuaire/suite/', views.tutor_list_more, name='tutor_list_more'),
     path('professeur/<int:pk>/', views.tutor_detail, name='tutor_detail'),
 ]
\ No newline at end of file
@@ -1,47 +1,189 @@
+import math
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg
+from django.db import transaction
 
-from apps.profiles.models import TutorProfile
+from apps.profiles.facets import directory_facets
+from apps.profiles.geo_index import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, tutors_near_quartier
+from apps.profiles.models import TutorProfile, TutorSearchEntry
+from apps.profiles.search_index import TUTOR_FTS_INDEX
 from apps.education.models import Subject, Level
-from apps.core.models import City
+from apps.core.models import City, Quartier
+from apps.core.fulltext import get_backend
+from apps.core.pagination import CursorPage, cursor_paginate
 from apps.billing.models import ContactUnlock
 from .models import CourseRequest, Review
 from .forms import RequestForm, ReviewForm
+from .feed import fan_out_request
+from .lifecycle import reactivate_request
+from .matching import queue_matching
+from .scoring import LUKEWARM, STRONG, qualify_request
+from .tutor_cards import CARD_PAGE_FIELDS, render_tutor_cards
 
-def tutor_list(request):
+TUTORS_PER_PAGE = 12
+REQUESTS_PER_PAGE = 12
+SEARCH_MAX_RESULTS = 300
+SEARCH_CHUNK_SIZE = 500
+
+
+def _load_more_url(request, url_name, page):
+    """ URL du fragment "Voir plus" : mêmes filtres GET, curseur suivant. """
+    if not page.has_next:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = page.next_cursor
+    return f"{reverse(url_name)}?{params.urlencode()}"
+
+
+def _tutor_ranked_page(request, ranked_ids):
+    """
+    Page d'une liste d'ids déjà classée (pertinence plein texte et/ou distance)
+    et déjà restreinte aux filtres de l'annuaire.
+    Les résultats sont bornés (SEARCH_MAX_RESULTS) : le curseur est ici un simple rang.
+    """
+    cursor = request.GET.get('cursor', '')
+    offset = int(cursor) if cursor.isdigit() else 0
+
+    page_ids = ranked_ids[offset:offset + TUTORS_PER_PAGE]
+    tutors = TutorProfile.objects.only(*CARD_PAGE_FIELDS).in_bulk(page_ids)
+    items = [tutors[pk] for pk in page_ids if pk in tutors]
+    has_next = len(ranked_ids) > offset + TUTORS_PER_PAGE
+    return CursorPage(items, str(offset + TUTORS_PER_PAGE) if has_next else None)
+
+
+def _filter_nearest(near_ids, entries, query):
     """
-    Affiche l'annuaire des professeurs avec filtres.
+    Profs du rayon (du plus proche au plus lointain) qui passent les filtres de l'annuaire,
+    et la recherche plein texte s'il y en a une, bornés APRÈS filtrage à SEARCH_MAX_RESULTS.
+    Par tranches de SEARCH_CHUNK_SIZE ids : pas de liste IN géante, et on s'arrête dès
+    que la limite est atteinte (les plus proches d'abord).
     """
-    tutors = TutorProfile.objects.filter(status='validated')
+    ranked_ids = []
+    for start in range(0, len(near_ids), SEARCH_CHUNK_SIZE):
+        chunk = near_ids[start:start + SEARCH_CHUNK_SIZE]
+        within = entries.filter(tutor_id__in=chunk).values('tutor_id')
+        if query:
+            matching = set(get_backend().search(TUTOR_FTS_INDEX, query, len(chunk), within=within))
+        else:
+            matching = set(within.values_list('tutor_id', flat=True))
+        ranked_ids.extend(pk for pk in chunk if pk in matching)
+        if len(ranked_ids) >= SEARCH_MAX_RESULTS:
+            break
+    return ranked_ids[:SEARCH_MAX_RESULTS]
 
+
+def _near_filter(request):
+    """ (Quartier, rayon en km) du filtre "Près de", ou (None, None). """
+    quartier_id = request.GET.get('near', '')
+    if not quartier_id.isdigit():
+        return None, None
+    quartier = Quartier.objects.filter(pk=quartier_id).first()
+    try:
+        radius = float(request.GET.get('radius') or DEFAULT_RADIUS_KM)
+    except ValueError:
+        radius = DEFAULT_RADIUS_KM
+    if not math.isfinite(radius):
+        radius = DEFAULT_RADIUS_KM  # "nan" / "inf" passent float() mais cassent le calcul de la grille
+    return quartier, min(max(radius, 1), MAX_RADIUS_KM)
+
+
+def _tutor_directory_page(request):
+    """
+    Une page de l'annuaire (profs validés) selon les filtres GET.
+    """
     subject_id = request.GET.get('subject')
     city_id = request.GET.get('city')
     level_id = request.GET.get('level')
 
-    if subject_id:
-        tutors = tutors.filter(subjects__id=subject_id)
-    
-    if level_id:
-        tutors = tutors.filter(levels__id=level_id)
-        
-    # Note: Pour filtrer par ville, il faudrait lier City au TutorProfile dans le futur
-    # if city_id: tutors = tutors.filter(city_id=city_id)
+    # Recherche via l'index dénormalisé (profiles.TutorSearchEntry) :
+    # une seule ligne par prof validé pour chaque combinaison Matière/Niveau,
+    # donc ni jointure sur les M2M ni DISTINCT.
+    entry_filters = {
+        'subject_id': subject_id or None,
+        'level_id': level_id or None,
+    }
+    if city_id:
+        entry_filters['city_id'] = city_id
+
+    # Plein texte (pertinence) et/ou proximité (distance) : liste d'ids classée d'avance
+    query = request.GET.get('q', '').strip()
+    quartier, radius = _near_filter(request)
+    # Les filtres de l'annuaire s'appliquent AVANT de tronquer à SEARCH_MAX_RESULTS
+    if query or quartier:
+        entries = TutorSearchEntry.objects.filter(**entry_filters)
+        if quartier:
+            # Tous les profs du rayon (index en mémoire), tronqués seulement une fois filtrés
+            near_ids = [pk for pk, _ in tutors_near_quartier(quartier, radius)]
+            ranked_ids = _filter_nearest(near_ids, entries, query)
+        else:
+            # Filtres passés au plein texte en sous-requête : même requête, puis LIMIT
+            ranked_ids = get_backend().search(
+                TUTOR_FTS_INDEX, query, SEARCH_MAX_RESULTS, within=entries.values('tutor_id'),
+            )
+        return _tutor_ranked_page(request, ranked_ids)
+
+    # Toutes les conditions dans le MÊME filter() pour n'avoir qu'une jointure.
+    lookup = {f'search_entries__{field}': value for field, value in entry_filters.items()}
+    lookup['search_entries__isnull'] = False  # force l'INNER JOIN (les "= NULL" le transformeraient en LEFT JOIN)
+
+    # Tri "Mieux notés" : score bayésien copié dans l'index (tutor_search_rating_idx)
+    if request.GET.get('sort') == 'rating':
+        order_field = 'search_entries__rating_score'
+    else:
+        order_field = 'search_entries__created_at'
+
+    return cursor_paginate(
+        # Les cartes viennent du cache (tutor_cards.py) : on ne lit que ids, versions et clés de tri
+        TutorProfile.objects.only(*CARD_PAGE_FIELDS),
+        request.GET.get('cursor'), TUTORS_PER_PAGE,
+        filters=lookup,
+        order_field=order_field,
+        pk_field='search_entries__tutor_id',
+    )
+
+
+def tutor_list(request):
+    """
+    Affiche l'annuaire des professeurs avec filtres (pagination par curseur).
+    """
+    page = _tutor_directory_page(request)
+
+    subjects = list(Subject.objects.all())
+    levels = list(Level.objects.all())
+    cities = list(City.objects.all())
 
-    subjects = Subject.objects.all()
-    levels = Level.objects.all()
-    cities = City.objects.all()
+    # Nombre de profs pour chaque option, compte tenu des autres filtres
+    facets = directory_facets(request.GET.get('subject'), request.GET.get('level'), request.GET.get('city'))
+    for options, counts in ((subjects, facets['subjects']), (levels, facets['levels']), (cities, facets['cities'])):
+        for option in options:
+            option.facet_count = counts.get(option.pk, 0)
 
     context = {
-        'tutors': tutors.distinct(),
+        'tutor_cards': render_tutor_cards(page.items),
+        'more_url': _load_more_url(request, 'tutor_list_more', page),
         'subjects': subjects,
         'levels': levels,
         'cities': cities,
+        'quartiers': Quartier.objects.filter(latitude__isnull=False).select_related('city'),
+        'radius_choices': [2, 5, 10, 20],
     }
     return render(request, 'marketplace/tutor_list.html', context)
 
 
+def tutor_list_more(request):
+    """
+    Fragment HTML "Voir plus" de l'annuaire (cartes de la page suivante).
+    """
+    page = _tutor_directory_page(request)
+    return render(request, 'marketplace/_tutor_cards.html', {
+        'tutor_cards': render_tutor_cards(page.items),
+        'more_url': _load_more_url(request, 'tutor_list_more', page),
+    })
+
+
 def tutor_detail(request, pk):
     """
     Affiche le profil public complet d'un prof avec Paywall et Avis.
@@ -57,8 +199,8 @@ def tutor_detail(request, pk):
             is_unlocked = True
 
     # --- Gestion des Avis ---
+    # Note moyenne et nombre d'avis sont stockés sur le profil (marketplace/ratings.py)
     reviews = tutor.reviews.all()
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
     
     # Formulaire d'avis (si autorisé)
     review_form = None
@@ -69,7 +211,8 @@ def tutor_detail(request, pk):
                 review = review_form.save(commit=False)
                 review.tutor = tutor
                 review.author = request.user
-                review.save()
+                with transaction.atomic():  # L'avis et la note du prof sont enregistrés ensemble
+                    review.save()
                 messages.success(request, "Votre avis a été publié avec succès !")
                 return redirect('tutor_detail', pk=pk)
         else:
@@ -79,8 +222,8 @@ def tutor_detail(request, pk):
         'tutor': tutor,
         'is_unlocked': is_unlocked,
         'reviews': reviews,
-        'avg_rating': round(avg_rating, 1),
-        'review_count': reviews.count(),
+        'avg_rating': round(tutor.avg_rating, 1),
+        'review_count': tutor.review_count,
         'review_form': review_form,
     }
     return render(request, 'marketplace/tutor_detail.html', context)
@@ -103,37 +246,26 @@ def create_request(request):
             req = form.save(commit=False)
             req.parent = request.user
             
-            # --- ALGORITHME DE SCORING (Règles CDC) ---
-            # 1. Budget suffisant (>= 30 000)
-            strong_budget = req.budget_range in ['standard', 'high', 'premium']
-            
-            # 2. Délai court (Immédiat ou < 4 semaines)
-            strong_start = req.start_time in ['asap', '1-4weeks']
-            
-            # 3. Intention déclarée
-            wants_to_start = req.intention == 'start'
+            # --- SCORING (Règles CDC, seuil de budget du pays : cf. scoring.py) ---
+            req.qualification = qualify_request(req)
+            req.save()
+            form.save_m2m()
 
             # Route A : Intention Forte
-            if wants_to_start and strong_start and strong_budget:
-                req.qualification = "Intention Forte"
-                req.save()
-                form.save_m2m()
+            if req.qualification == STRONG:
                 messages.success(request, "Excellent ! Votre demande est prioritaire. Les enseignants vont vous contacter.")
-            
             # Route B : Intention Tiède
-            elif (req.intention == 'info' or req.start_time == 'later') and strong_budget:
-                req.qualification = "Intention Tiède"
-                req.save()
-                form.save_m2m()
+            elif req.qualification == LUKEWARM:
                 messages.info(request, "Demande enregistrée. Vous recevrez des informations par email.")
-            
             # Route C : Budget Faible / Autre
             else:
-                req.qualification = "Budget Limité / Autre"
-                req.save()
-                form.save_m2m()
                 messages.warning(request, "Votre budget est un peu bas pour trouver rapidement un professeur, mais votre annonce est en ligne.")
 
+            # Suggestions de profs : demande en file (match_queued_at), calculées par le
+            # planificateur dans la minute, pas pendant la requête du parent
+
+            # Publication dans le fil des profs concernés
+            fan_out_request(req)
             return redirect('dashboard')
     else:
         form = RequestForm()
@@ -157,9 +289,12 @@ def edit_request(request, pk):
         if form.is_valid():
             req = form.save(commit=False)
             if req.status != 'active':
-                req.status = 'active' # Réactivation si modifiée
+                reactivate_request(req)  # Réactivation si modifiée : nouveau délai d'expiration
+            req.qualification = qualify_request(req)  # Budget / délai ont pu changer
+            queue_matching(req)  # Suggestions recalculées par le planificateur
             req.save()
             form.save_m2m()
+            fan_out_request(req)
             messages.success(request, "Votre demande a été mise à jour.")
             return redirect('dashboard')
     else:
@@ -171,26 +306,74 @@ def edit_request(request, pk):
     })
 
 
+def _is_tutor_or_admin(user):
+    is_tutor = hasattr(user, 'role') and user.role == 'tutor'
+    return is_tutor or user.is_superuser
+
+
+def _request_board_page(request):
+    """
+    Une page de la place de marché (filtre ville optionnel) :
+    - prof validé : son fil personnalisé (FeedItem, lecture sur l'index du fil) ;
+    - admin / prof pas encore validé : toutes les demandes ACTIVES.
+    """
+    filters = {'status': 'active'}
+    city_id = request.GET.get('city')
+    if city_id:
+        filters['city_id'] = city_id
+
+    requests = CourseRequest.objects.select_related('level', 'city').prefetch_related('subjects')
+    tutor_id = (TutorProfile.objects.filter(user=request.user, status='validated')
+                .values_list('id', flat=True).first())
+    if tutor_id is None:
+        return cursor_paginate(requests, request.GET.get('cursor'), REQUESTS_PER_PAGE, filters=filters)
+
+    # Même filter() que le curseur : une seule jointure sur le fil
+    filters['feed_items__tutor_id'] = tutor_id
+    return cursor_paginate(
+        requests, request.GET.get('cursor'), REQUESTS_PER_PAGE, filters=filters,
+        order_field='feed_items__created_at', pk_field='feed_items__request_id',
+    )
+
+
 @login_required
 def request_list(request):
     """
     Place de marché pour les ENSEIGNANTS (Voir les offres).
     """
-    is_tutor = hasattr(request.user, 'role') and request.user.role == 'tutor'
-    if not is_tutor and not request.user.is_superuser:
+    if not _is_tutor_or_admin(request.user):
         messages.error(request, "Accès réservé aux enseignants.")
         return redirect('home')
 
-    # Récupère les demandes ACTIVES
-    requests = CourseRequest.objects.filter(status='active').order_by('-created_at')
+    page = _request_board_page(request)
 
-    # Filtre ville
-    city_id = request.GET.get('city')
-    if city_id:
-        requests = requests.filter(city_id=city_id)
+    # Demandes recommandées par le moteur de matching (première page uniquement)
+    recommended = []
+    if not request.GET.get('cursor'):
+        recommended = (CourseRequest.objects
+                       .filter(tutor_matches__tutor__user=request.user, status='active')
+                       .select_related('level', 'city').prefetch_related('subjects')
+                       .order_by('-tutor_matches__score')[:6])
 
     context = {
-        'requests': requests,
+        'requests': page,
+        'recommended': recommended,
+        'more_url': _load_more_url(request, 'request_list_more', page),
         'cities': City.objects.all(),
     }
-    return render(request, 'marketplace/request_list.html', context)
\ No newline at end of file
+    return render(request, 'marketplace/request_list.html', context)
+
+
+@login_required
+def request_list_more(request):
+    """
+    Fragment HTML "Voir plus" de la place de marché.
+    """
+    if not _is_tutor_or_admin(request.user):
+        return redirect('home')
+
+    page = _request_board_page(request)
+    return render(request, 'marketplace/_request_cards.html', {
+        'requests': page,
+        'more_url': _load_more_url(request, 'request_list_more', page),
+    })
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import TutorProfile, ParentProfile
+from .search_index import reindex_tutors
 
 @admin.register(TutorProfile)
 class TutorProfileAdmin(admin.ModelAdmin):
@@ -23,11 +24,13 @@ class TutorProfileAdmin(admin.ModelAdmin):
     # Action : Tout valider
     def approve_profiles(self, request, queryset):
         queryset.update(status='validated')
+        reindex_tutors(queryset)  # update() ne déclenche pas les signaux
     approve_profiles.short_description = "✅ Valider les dossiers sélectionnés"
 
     # Action : Tout rejeter
     def reject_profiles(self, request, queryset):
         queryset.update(status='rejected')
+        reindex_tutors(queryset)
     reject_profiles.short_description = "❌ Rejeter les dossiers sélectionnés"
 
 @admin.register(ParentProfile)
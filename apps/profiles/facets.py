@@ -0,0 +1,69 @@
+"""
+Compteurs des filtres de l'annuaire : nombre de profs validés par matière, niveau et ville,
+compte tenu des AUTRES filtres sélectionnés ("Maths (12)" quand on a déjà choisi Abidjan).
+
+Calculés en une seule requête GROUP BY sur l'index TutorSearchEntry
+(un prof = une ligne par combinaison Matière/Niveau, NULL = joker), puis mis en cache.
+Le cache est invalidé par search_index dès qu'un prof entre ou sort de l'annuaire.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import TutorSearchEntry
+
+FACETS_CACHE_TIMEOUT = 120
+FACETS_GENERATION_KEY = 'directory_facets:generation'
+
+
+def _as_id(value):
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def invalidate_facets():
+    """ Rend obsolètes tous les compteurs en cache (changement de génération, pas de suppression). """
+    try:
+        cache.incr(FACETS_GENERATION_KEY)
+    except ValueError:
+        cache.set(FACETS_GENERATION_KEY, 1, None)
+
+
+def compute_facets(subject_id=None, level_id=None, city_id=None):
+    """
+    Retourne {'subjects': {id: n}, 'levels': {id: n}, 'cities': {id: n}}.
+
+    Une seule requête : les lignes "toutes matières" OU "tous niveaux" (celles dont
+    l'autre axe correspond au filtre) regroupées par (matière, niveau, ville).
+    Chaque facette se déduit ensuite de ces groupes en Python.
+    """
+    rows = (
+        TutorSearchEntry.objects
+        .filter(Q(subject_id=subject_id) | Q(level_id=level_id))
+        .values_list('subject_id', 'level_id', 'city_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    facets = {'subjects': {}, 'levels': {}, 'cities': {}}
+    for subject, level, city, n in rows:
+        in_city = city_id is None or city == city_id
+        if subject is not None and level == level_id and in_city:
+            facets['subjects'][subject] = facets['subjects'].get(subject, 0) + n
+        if level is not None and subject == subject_id and in_city:
+            facets['levels'][level] = facets['levels'].get(level, 0) + n
+        if subject == subject_id and level == level_id and city is not None:
+            facets['cities'][city] = facets['cities'].get(city, 0) + n
+    return facets
+
+
+def directory_facets(subject_id=None, level_id=None, city_id=None):
+    """ compute_facets() avec cache court, clé = filtres + génération courante. """
+    subject_id, level_id, city_id = _as_id(subject_id), _as_id(level_id), _as_id(city_id)
+    generation = cache.get(FACETS_GENERATION_KEY, 0)
+    key = f'directory_facets:{generation}:{subject_id}:{level_id}:{city_id}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(subject_id, level_id, city_id)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,76 @@
+"""
+Index de proximité des profs validés (en mémoire, un par worker).
+
+Position d'un prof = centroïde de son quartier (TutorProfile.quartier_ref).
+L'index est une grille (core.geo.GridIndex) :
+- mis à jour prof par prof depuis search_index.reindex_tutor (même worker) ;
+- resynchronisé toutes les GEO_SYNC_SECONDS avec la base pour récupérer les
+  changements faits par les autres workers : seuls les écarts sont appliqués,
+  la grille n'est jamais reconstruite de zéro.
+"""
+import threading
+import time
+
+from apps.core.geo import GridIndex
+from apps.core.models import Quartier
+from .models import TutorProfile
+
+GEO_SYNC_SECONDS = 60
+DEFAULT_RADIUS_KM = 5
+MAX_RADIUS_KM = 30
+
+
+class TutorGeoIndex:
+    def __init__(self):
+        self.grid = GridIndex()
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def sync(self, force=False):
+        if not force and self.synced_at is not None and time.monotonic() - self.synced_at < GEO_SYNC_SECONDS:
+            return
+        rows = (TutorProfile.objects
+                .filter(status='validated', quartier_ref__latitude__isnull=False, quartier_ref__longitude__isnull=False)
+                .values_list('id', 'quartier_ref__latitude', 'quartier_ref__longitude'))
+        current = {pk: (lat, lng) for pk, lat, lng in rows}
+        with self.lock:
+            for pk in set(self.grid.positions) - current.keys():
+                self.grid.remove(pk)
+            for pk, (lat, lng) in current.items():
+                self.grid.add(pk, lat, lng)
+            self.synced_at = time.monotonic()
+
+    def update_tutor(self, tutor):
+        """ Applique tout de suite la nouvelle position (ou le retrait) d'un prof. """
+        if self.synced_at is None:
+            return  # Pas chargé (ou invalidé) : le prochain sync() lira l'état à jour
+        position = None
+        if tutor.status == 'validated' and tutor.quartier_ref_id:
+            position = Quartier.objects.filter(pk=tutor.quartier_ref_id).values_list('latitude', 'longitude').first()
+        with self.lock:
+            if position and None not in position:
+                self.grid.add(tutor.pk, *position)
+            else:
+                self.grid.remove(tutor.pk)
+
+    def invalidate(self):
+        """ Centroïdes modifiés : resynchronisation complète à la prochaine recherche. """
+        self.synced_at = None
+
+    def nearest(self, lat, lng, radius_km=DEFAULT_RADIUS_KM, limit=None):
+        self.sync()
+        with self.lock:
+            return self.grid.nearest(lat, lng, min(radius_km, MAX_RADIUS_KM), limit)
+
+
+tutor_geo_index = TutorGeoIndex()
+
+
+def tutors_near_quartier(quartier, radius_km=DEFAULT_RADIUS_KM, limit=None):
+    """
+    [(tutor_id, distance_km)] des profs validés à moins de radius_km du centroïde
+    de `quartier`, du plus proche au plus lointain. Vide si le quartier n'est pas géolocalisé.
+    """
+    if quartier is None or not quartier.has_position:
+        return []
+    return tutor_geo_index.nearest(quartier.latitude, quartier.longitude, radius_km, limit)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.profiles.search_index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index dénormalisé de l'annuaire des professeurs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre de profs traités par lot")
+
+    def handle(self, *args, **options):
+        self.stdout.write("🚀 Reconstruction de l'index de l'annuaire...")
+        total = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} lignes d'index créées."))
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_index(apps, schema_editor):
+    # Version "historique" de search_index.rebuild_index pour les données existantes
+    TutorProfile = apps.get_model('profiles', 'TutorProfile')
+    TutorSearchEntry = apps.get_model('profiles', 'TutorSearchEntry')
+    entries = []
+    for tutor in TutorProfile.objects.filter(status='validated').prefetch_related('subjects', 'levels'):
+        subject_ids = [None] + [s.pk for s in tutor.subjects.all()]
+        level_ids = [None] + [l.pk for l in tutor.levels.all()]
+        for subject_id in subject_ids:
+            for level_id in level_ids:
+                entries.append(TutorSearchEntry(
+                    tutor_id=tutor.pk, subject_id=subject_id, level_id=level_id,
+                    city_id=tutor.city_id, created_at=tutor.created_at,
+                ))
+    TutorSearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_country_options_country_casier_delay_weeks_and_more'),
+        ('education', '0001_initial'),
+        ('profiles', '0004_tutorprofile_city_tutorprofile_quartier_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('city', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.city')),
+                ('level', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='education.level')),
+                ('subject', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='education.subject')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='profiles.tutorprofile')),
+            ],
+            options={
+                'verbose_name': "Entrée d'index annuaire",
+                'verbose_name_plural': 'Index annuaire',
+                'indexes': [models.Index(fields=['subject', 'level', 'city', '-created_at'], name='tutor_search_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_country_options_country_casier_delay_weeks_and_more'),
+        ('education', '0001_initial'),
+        ('profiles', '0005_tutorsearchentry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tutorsearchentry',
+            name='tutor_search_lookup_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tutorsearchentry',
+            index=models.Index(fields=['subject', 'level', 'city', '-created_at', '-tutor'], name='tutor_search_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:31
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_ratings(apps, schema_editor):
+    # Même formule que marketplace.ratings.bayesian_score (prior 3.5, poids 5)
+    TutorProfile = apps.get_model('profiles', 'TutorProfile')
+    TutorSearchEntry = apps.get_model('profiles', 'TutorSearchEntry')
+    Review = apps.get_model('marketplace', 'Review')
+    stats = Review.objects.values('tutor_id').annotate(avg=Avg('rating'), count=Count('id')).order_by()
+    for row in stats:
+        score = round((row['avg'] * row['count'] + 3.5 * 5) / (row['count'] + 5), 4)
+        TutorProfile.objects.filter(pk=row['tutor_id']).update(
+            avg_rating=row['avg'], review_count=row['count'], rating_score=score,
+        )
+        TutorSearchEntry.objects.filter(tutor_id=row['tutor_id']).update(rating_score=score)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0004_courserequest_request_status_created_idx_and_more'),
+        ('core', '0002_alter_country_options_country_casier_delay_weeks_and_more'),
+        ('education', '0001_initial'),
+        ('profiles', '0006_remove_tutorsearchentry_tutor_search_lookup_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='avg_rating',
+            field=models.FloatField(default=0, verbose_name='Note moyenne'),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_score',
+            field=models.FloatField(default=3.5, verbose_name='Score de classement'),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, verbose_name="Nombre d'avis"),
+        ),
+        migrations.AddField(
+            model_name='tutorsearchentry',
+            name='rating_score',
+            field=models.FloatField(default=3.5),
+        ),
+        migrations.AddIndex(
+            model_name='tutorsearchentry',
+            index=models.Index(fields=['subject', 'level', 'city', '-rating_score', '-tutor'], name='tutor_search_rating_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
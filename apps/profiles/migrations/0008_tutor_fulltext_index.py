@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:33
+
+from django.db import migrations
+
+from apps.core.fulltext import get_backend
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Table FTS5 (SQLite) ou tsvector + GIN (PostgreSQL), puis indexation des profs validés
+    backend = get_backend(schema_editor.connection)
+    backend.create_index('tutors')
+
+    TutorProfile = apps.get_model('profiles', 'TutorProfile')
+    tutors = TutorProfile.objects.filter(status='validated').select_related('city').prefetch_related('subjects')
+    for tutor in tutors:
+        names = [s.name for s in tutor.subjects.all()]
+        title = ' '.join([*names, tutor.city.name if tutor.city else '', tutor.quartier])
+        backend.update('tutors', tutor.pk, title, tutor.bio)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    get_backend(schema_editor.connection).drop_index('tutors')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_tutor_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.core.geo import match_quartier
+
+
+def link_quartiers(apps, schema_editor):
+    Quartier = apps.get_model('core', 'Quartier')
+    TutorProfile = apps.get_model('profiles', 'TutorProfile')
+    quartiers = list(Quartier.objects.values_list('id', 'city_id', 'name'))
+    for pk, city_id, text in TutorProfile.objects.exclude(quartier='').values_list('id', 'city_id', 'quartier'):
+        quartier_id = match_quartier(city_id, text, quartiers)
+        if quartier_id:
+            TutorProfile.objects.filter(pk=pk).update(quartier_ref_id=quartier_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_quartier'),
+        ('profiles', '0009_tutor_card_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='quartier_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tutors', to='core.quartier', verbose_name='Quartier (référentiel)'),
+        ),
+        migrations.RunPython(link_quartiers, migrations.RunPython.noop),
+    ]
@@ -32,10 +32,17 @@ class TutorProfile(models.Model):
     # --- 1. Infos Publiques ---
     bio = models.TextField(verbose_name="Biographie", help_text="Présentez-vous aux parents.")
     photo = models.ImageField(upload_to='tutors/photos/', verbose_name="Photo de profil")
+    # Versions redimensionnées WebP/JPEG de la photo (cf. core/images.py)
+    photo_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     
     # --- 2. Localisation (NOUVEAU) ---
     city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Ville de résidence")
     quartier = models.CharField(max_length=100, blank=True, verbose_name="Quartier / Commune")
+    # Rattachement automatique du texte ci-dessus au référentiel (recherche par proximité)
+    quartier_ref = models.ForeignKey(
+        'core.Quartier', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='tutors', verbose_name="Quartier (référentiel)",
+    )
 
     # --- 3. Documents (Privé) ---
     cni_document = models.FileField(upload_to='secure/identity/', blank=True, verbose_name="CNI / Passeport")
@@ -49,14 +56,70 @@ class TutorProfile(models.Model):
     is_online_class = models.BooleanField(default=False, verbose_name="Accepte cours en ligne")
     is_home_class = models.BooleanField(default=True, verbose_name="Accepte cours à domicile")
 
-    # --- 5. Gestion ---
+    # --- 5. Notation (dénormalisée, maintenue par marketplace/ratings.py) ---
+    avg_rating = models.FloatField(default=0, verbose_name="Note moyenne")
+    review_count = models.PositiveIntegerField(default=0, verbose_name="Nombre d'avis")
+    # Moyenne bayésienne : un 5/5 sur un seul avis ne passe pas devant 4,8/5 sur 40 avis
+    # (3.5 = score d'un prof sans avis, cf. RATING_PRIOR_MEAN)
+    rating_score = models.FloatField(default=3.5, verbose_name="Score de classement")
+
+    # --- 6. Gestion ---
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name="Statut")
     admin_notes = models.TextField(blank=True, verbose_name="Note Admin")
     created_at = models.DateTimeField(auto_now_add=True)
     validated_at = models.DateTimeField(null=True, blank=True)
 
+    # Incrémenté à chaque modification visible sur la carte de l'annuaire (cf. marketplace/tutor_cards.py)
+    card_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Tenus à jour par des update() ciblés (agrégats de notation, cf. marketplace/ratings.py ;
+    # déclinaisons de la photo, cf. core/images.py)
+    UPDATE_ONLY_FIELDS = ('avg_rating', 'review_count', 'rating_score', 'photo_derivatives')
+
     def __str__(self):
         return f"Prof: {self.user.username} [{self.get_status_display()}]"
 
+    def save(self, *args, **kwargs):
+        # Profil existant : une sauvegarde ordinaire (tableau de bord, validation, /admin) ne
+        # réécrit pas les valeurs de ces champs lues au chargement, peut-être dépassées depuis.
+        # On relit celles de la base : les signaux (index de l'annuaire) copient les bonnes.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.UPDATE_ONLY_FIELDS
+            ]
+            current = type(self).objects.filter(pk=self.pk).values(*self.UPDATE_ONLY_FIELDS).first()
+            for name, value in (current or {}).items():
+                setattr(self, name, value)
+        super().save(*args, **kwargs)
+
     def is_visible(self):
-        return self.status == 'validated'
\ No newline at end of file
+        return self.status == 'validated'
+
+class TutorSearchEntry(models.Model):
+    """
+    Index dénormalisé de l'annuaire (une ligne par combinaison Matière x Niveau).
+    Seuls les profs validés y figurent. Les lignes avec subject/level à NULL
+    servent de joker ("toutes les matières", "tous niveaux") : chaque filtre de
+    l'annuaire correspond donc à exactement une ligne par prof, sans DISTINCT.
+    Maintenu par les signaux de profiles/signals.py.
+    """
+    tutor = models.ForeignKey(TutorProfile, on_delete=models.CASCADE, related_name='search_entries')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, null=True, related_name='+')
+    level = models.ForeignKey(Level, on_delete=models.CASCADE, null=True, related_name='+')
+    city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, related_name='+')
+
+    # Copies de TutorProfile pour trier sans revenir à la table des profils
+    created_at = models.DateTimeField()
+    rating_score = models.FloatField(default=3.5)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['subject', 'level', 'city', '-created_at', '-tutor'], name='tutor_search_lookup_idx'),
+            models.Index(fields=['subject', 'level', 'city', '-rating_score', '-tutor'], name='tutor_search_rating_idx'),
+        ]
+        verbose_name = "Entrée d'index annuaire"
+        verbose_name_plural = "Index annuaire"
+
+    def __str__(self):
+        return f"{self.tutor_id}: {self.subject_id}/{self.level_id}/{self.city_id}"
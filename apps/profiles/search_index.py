@@ -0,0 +1,138 @@
+"""
+Maintenance des index de l'annuaire :
+- TutorSearchEntry (filtres Matière / Niveau / Ville, tri) ;
+- index plein texte 'tutors' (bio, quartier, ville, matières) via apps.core.fulltext.
+"""
+from django.db import transaction
+
+from apps.core.fulltext import get_backend
+from apps.core.models import City
+from apps.marketplace.feed import refresh_tutor_feed
+from .facets import invalidate_facets
+from .geo_index import tutor_geo_index
+from .models import TutorProfile, TutorSearchEntry
+
+TUTOR_FTS_INDEX = 'tutors'
+
+# Champs (hors matières / niveaux) dont dépend le fil des demandes du prof (marketplace/feed.py)
+FEED_FIELDS = ('status', 'city', 'is_online_class')
+
+
+def feed_state(tutor):
+    return tutor.status, tutor.city_id, tutor.is_online_class
+
+
+def build_entries(tutor, subject_ids, level_ids):
+    """
+    Construit (sans les enregistrer) les lignes d'index d'un prof.
+    On ajoute None à chaque axe pour générer les lignes "joker".
+    """
+    return [
+        TutorSearchEntry(
+            tutor_id=tutor.pk,
+            subject_id=subject_id,
+            level_id=level_id,
+            city_id=tutor.city_id,
+            created_at=tutor.created_at,
+            rating_score=tutor.rating_score,
+        )
+        for subject_id in [None, *subject_ids]
+        for level_id in [None, *level_ids]
+    ]
+
+
+def tutor_document(tutor, subject_names, city_name):
+    """
+    Texte indexé pour la recherche plein texte : (titre, corps).
+    Les matières et la localisation pèsent plus lourd que la biographie.
+    """
+    title = ' '.join([*subject_names, city_name or '', tutor.quartier or ''])
+    return title, tutor.bio or ''
+
+
+def reindex_tutor(tutor, refresh_feed=True):
+    """
+    Recalcule les lignes d'index d'un seul prof.
+    Un prof non validé n'a aucune ligne : il disparaît de l'annuaire.
+    refresh_feed : statut, ville, cours en ligne, matières ou niveaux ont changé,
+    son fil de demandes est reconstruit (inutile pour une bio ou une photo).
+    """
+    backend = get_backend()
+    with transaction.atomic():
+        # Exécutés après le commit, donc sur l'index à jour
+        transaction.on_commit(lambda: tutor_geo_index.update_tutor(tutor))
+        if refresh_feed:
+            # Les demandes déjà publiées sont re-poussées vers lui
+            transaction.on_commit(lambda: refresh_tutor_feed(tutor.pk))
+        deleted, _ = TutorSearchEntry.objects.filter(tutor_id=tutor.pk).delete()
+        if tutor.status != 'validated':
+            backend.delete(TUTOR_FTS_INDEX, tutor.pk)
+            if deleted:
+                # Prof suspendu / rejeté : il sort des compteurs de filtres
+                transaction.on_commit(invalidate_facets)
+            return 0
+        subjects = list(tutor.subjects.values_list('id', 'name'))
+        level_ids = list(tutor.levels.values_list('id', flat=True))
+        entries = build_entries(tutor, [pk for pk, _ in subjects], level_ids)
+        TutorSearchEntry.objects.bulk_create(entries)
+
+        city_name = City.objects.filter(pk=tutor.city_id).values_list('name', flat=True).first()
+        title, body = tutor_document(tutor, [name for _, name in subjects], city_name)
+        backend.update(TUTOR_FTS_INDEX, tutor.pk, title, body)
+        transaction.on_commit(invalidate_facets)
+    return len(entries)
+
+
+def reindex_tutors(queryset, refresh_feed=True):
+    """
+    Recalcule l'index pour un ensemble de profs (actions admin en masse).
+    """
+    count = 0
+    for tutor in queryset.only('id', 'status', 'city_id', 'quartier', 'quartier_ref_id', 'bio', 'created_at', 'rating_score'):
+        count += reindex_tutor(tutor, refresh_feed)
+    return count
+
+
+def rebuild_index(batch_size=500):
+    """
+    Reconstruit tout l'index (lignes de filtres + plein texte) à partir des tables sources.
+    Les relations M2M sont chargées en une requête par lot.
+    """
+    subjects_through = TutorProfile.subjects.through
+    levels_through = TutorProfile.levels.through
+    backend = get_backend()
+    cities = dict(City.objects.values_list('id', 'name'))
+    total = 0
+
+    with transaction.atomic():
+        TutorSearchEntry.objects.all().delete()
+        backend.clear(TUTOR_FTS_INDEX)
+
+        tutors = (TutorProfile.objects.filter(status='validated')
+                  .only('id', 'city_id', 'quartier', 'bio', 'created_at', 'rating_score').order_by('pk'))
+        last_pk = 0
+        while True:
+            batch = list(tutors.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            ids = [t.pk for t in batch]
+
+            subjects_map, levels_map = {}, {}
+            rows = subjects_through.objects.filter(tutorprofile_id__in=ids).values_list('tutorprofile_id', 'subject_id', 'subject__name')
+            for tutor_id, subject_id, subject_name in rows:
+                subjects_map.setdefault(tutor_id, []).append((subject_id, subject_name))
+            for tutor_id, level_id in levels_through.objects.filter(tutorprofile_id__in=ids).values_list('tutorprofile_id', 'level_id'):
+                levels_map.setdefault(tutor_id, []).append(level_id)
+
+            entries = []
+            for tutor in batch:
+                subjects = subjects_map.get(tutor.pk, [])
+                entries += build_entries(tutor, [pk for pk, _ in subjects], levels_map.get(tutor.pk, []))
+                title, body = tutor_document(tutor, [name for _, name in subjects], cities.get(tutor.city_id))
+                backend.update(TUTOR_FTS_INDEX, tutor.pk, title, body)
+            TutorSearchEntry.objects.bulk_create(entries, batch_size=1000)
+            total += len(entries)
+
+        transaction.on_commit(invalidate_facets)
+    return total
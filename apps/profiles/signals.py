@@ -0,0 +1,142 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.expressions import Combinable
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.accounts.models import CustomUser
+from apps.core.geo import resolve_quartier
+from apps.core.images import TUTOR_PHOTO_WIDTHS, derivatives_outdated, refresh_derivatives, refresh_in_background
+from apps.core.models import City, Quartier
+from apps.education.models import Subject
+from apps.marketplace.feed import refresh_tutor_feed
+from apps.marketplace.tutor_cards import bump_card_versions
+from .geo_index import tutor_geo_index
+from .models import TutorProfile
+from .search_index import FEED_FIELDS, feed_state, reindex_tutor, reindex_tutors
+
+
+@receiver(pre_save, sender=TutorProfile)
+def tutor_card_outdated(sender, instance, update_fields, **kwargs):
+    # Incrément fait par la base (F) : un objet chargé avant un autre incrément
+    # ne peut pas réécrire une ancienne version (et retomber sur une carte périmée).
+    # Sauvegarde ordinaire : TutorProfile.save a rempli update_fields, card_version compris
+    if not instance._state.adding and (update_fields is None or 'card_version' in update_fields):
+        instance.card_version = F('card_version') + 1
+
+
+@receiver(pre_save, sender=TutorProfile)
+def tutor_locate(sender, instance, update_fields, **kwargs):
+    # Rattache le quartier saisi au référentiel géolocalisé
+    if update_fields is None or {'city', 'quartier'} & set(update_fields):
+        instance.quartier_ref_id = resolve_quartier(instance.city_id, instance.quartier)
+
+
+@receiver(pre_save, sender=TutorProfile)
+def tutor_feed_state(sender, instance, update_fields, **kwargs):
+    # État en base avant l'écriture : le fil n'est reconstruit que s'il change
+    if instance._state.adding:
+        return
+    if update_fields is not None and not set(FEED_FIELDS) & set(update_fields):
+        instance._previous_feed_state = feed_state(instance)
+    else:
+        instance._previous_feed_state = (TutorProfile.objects.filter(pk=instance.pk)
+                                         .values_list(*FEED_FIELDS).first())
+
+
+@receiver(post_save, sender=TutorProfile)
+def tutor_saved(sender, instance, created, update_fields, **kwargs):
+    if isinstance(instance.card_version, Combinable):
+        instance.refresh_from_db(fields=['card_version'])
+    elif update_fields is not None and 'card_version' not in update_fields:
+        bump_card_versions([instance.pk])
+    # Statut, ville ou date ont pu changer : on recalcule les lignes du prof
+    reindex_tutor(instance, refresh_feed=False)
+    if created or getattr(instance, '_previous_feed_state', None) != feed_state(instance):
+        refresh_after_commit([instance.pk], reindex=False)
+    if derivatives_outdated(instance.photo, instance.photo_derivatives):
+        transaction.on_commit(lambda: refresh_in_background(refresh_tutor_photo, instance.pk))
+
+
+def refresh_tutor_photo(tutor_id, force=False):
+    """ Déclinaisons de la photo (après l'envoi) ; la carte de l'annuaire passe au srcset. """
+    if refresh_derivatives(TutorProfile, tutor_id, 'photo', 'photo_derivatives', TUTOR_PHOTO_WIDTHS, force):
+        bump_card_versions([tutor_id])
+
+
+def refresh_after_commit(tutor_ids, reindex=True):
+    """
+    Fil (et, si reindex, lignes d'index) des profs, reconstruits une seule fois après le commit.
+    Un enregistrement du formulaire prof envoie post_save puis jusqu'à quatre signaux m2m
+    (matières et niveaux : remove + add) : les ids s'accumulent sur la connexion et le
+    premier on_commit exécuté traite tout le lot, les suivants ne trouvent plus rien.
+    """
+    pending = _pending_refresh()
+    for tutor_id in tutor_ids:
+        pending[tutor_id] = pending.get(tutor_id, False) or reindex
+    transaction.on_commit(_run_pending_refresh)
+
+
+def _pending_refresh():
+    connection = transaction.get_connection()
+    if not hasattr(connection, 'pending_tutor_refresh'):
+        connection.pending_tutor_refresh = {}
+    return connection.pending_tutor_refresh
+
+
+def _run_pending_refresh():
+    pending = _pending_refresh()
+    if not pending:
+        return
+    batch = dict(pending)
+    pending.clear()
+    # Relus après le commit : ids d'une transaction annulée entre-temps ignorés
+    for tutor in TutorProfile.objects.filter(pk__in=list(batch)):
+        if batch[tutor.pk]:
+            reindex_tutor(tutor, refresh_feed=True)
+        else:
+            refresh_tutor_feed(tutor.pk)
+
+
+@receiver(m2m_changed, sender=TutorProfile.subjects.through)
+@receiver(m2m_changed, sender=TutorProfile.levels.through)
+def tutor_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Modification depuis Subject/Level : après le clear, on ne saurait plus qui était lié
+        instance._cleared_tutor_ids = list(instance.tutors.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    tutor_ids = [instance.pk] if not reverse else (
+        pk_set if pk_set is not None else getattr(instance, '_cleared_tutor_ids', []))
+    if tutor_ids:
+        bump_card_versions(tutor_ids)
+        refresh_after_commit(tutor_ids)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=City)
+def label_renamed(sender, instance, created, **kwargs):
+    # Le nom d'une matière ou d'une ville fait partie du texte indexé
+    if created:
+        return
+    # Seul le texte change : les fils des profs restent les mêmes
+    if sender is Subject:
+        bump_card_versions(instance.tutors.values_list('id', flat=True))
+        reindex_tutors(instance.tutors.filter(status='validated'), refresh_feed=False)
+    else:
+        reindex_tutors(TutorProfile.objects.filter(city=instance, status='validated'), refresh_feed=False)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_renamed(sender, instance, created, update_fields, **kwargs):
+    # La carte affiche prénom + initiale du nom (les mises à jour de last_login n'y touchent pas)
+    if created or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    bump_card_versions(TutorProfile.objects.filter(user_id=instance.pk).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Quartier)
+@receiver(post_delete, sender=Quartier)
+def quartier_moved(sender, **kwargs):
+    tutor_geo_index.invalidate()
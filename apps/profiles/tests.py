@@ -1,3 +1,50 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from apps.core.models import City, Country
+from apps.education.models import Level, Subject
+from apps.marketplace.ratings import _save_rating, bayesian_score
+
+from .models import TutorProfile, TutorSearchEntry
+
+User = get_user_model()
+
+
+class TutorSaveTests(TestCase):
+    """ Sauvegarde ordinaire d'un profil chargé avant une mise à jour ciblée (update()). """
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Côte d'Ivoire", code='CI')
+        city = City.objects.create(country=country, name='Abidjan')
+        user = User.objects.create(username='prof', role='tutor')
+        cls.tutor = TutorProfile.objects.create(user=user, bio='Maths', city=city, status='validated')
+        cls.tutor.subjects.add(Subject.objects.create(name='Maths'))
+        cls.tutor.levels.add(Level.objects.create(name='3ème'))
+
+    def test_stale_save_keeps_rating(self):
+        stale = TutorProfile.objects.get(pk=self.tutor.pk)
+        _save_rating(self.tutor.pk, 5.0, 3)
+        card_version = TutorProfile.objects.values_list('card_version', flat=True).get(pk=self.tutor.pk)
+
+        stale.bio = 'Maths et physique'
+        stale.save()
+
+        saved = TutorProfile.objects.get(pk=self.tutor.pk)
+        self.assertEqual((saved.bio, saved.avg_rating, saved.review_count), ('Maths et physique', 5.0, 3))
+        self.assertEqual(saved.card_version, card_version + 1)
+        # L'index de l'annuaire reprend le score en base, pas celui lu au chargement
+        scores = set(TutorSearchEntry.objects.filter(tutor=saved).values_list('rating_score', flat=True))
+        self.assertEqual(scores, {bayesian_score(5.0, 3)})
+
+    def test_stale_save_keeps_photo_derivatives(self):
+        TutorProfile.objects.filter(pk=self.tutor.pk).update(photo='tutors/photos/prof.jpg')
+        stale = TutorProfile.objects.get(pk=self.tutor.pk)
+        # Déclinaisons enregistrées pendant ce temps par la tâche de fond (store_derivatives)
+        derivatives = {'source': 'tutors/photos/prof.jpg', 'images': []}
+        TutorProfile.objects.filter(pk=self.tutor.pk).update(photo_derivatives=derivatives)
+
+        stale.bio = 'Maths et physique'
+        stale.save()
+
+        self.assertEqual(TutorProfile.objects.get(pk=self.tutor.pk).photo_derivatives, derivatives)
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 
 # Imports des Modèles
 from .models import TutorProfile, ParentProfile
@@ -37,15 +38,17 @@ def dashboard(request):
             p_form = TutorUpdateForm(request.POST, request.FILES, instance=profile)
 
             if u_form.is_valid() and p_form.is_valid():
-                u_form.save() # Sauvegarde Nom, Email, Tél
-                
-                profile_obj = p_form.save(commit=False)
-                # Gestion du statut : si brouillon, on passe en attente de validation
-                if profile_obj.status == 'draft':
-                    profile_obj.status = 'pending'
-                profile_obj.save()
-                
-                p_form.save_m2m() # Important pour les relations ManyToMany (Matières/Niveaux)
+                # Une seule transaction : index et fil du prof reconstruits une fois, après le commit
+                with transaction.atomic():
+                    u_form.save() # Sauvegarde Nom, Email, Tél
+
+                    profile_obj = p_form.save(commit=False)
+                    # Gestion du statut : si brouillon, on passe en attente de validation
+                    if profile_obj.status == 'draft':
+                        profile_obj.status = 'pending'
+                    profile_obj.save()
+
+                    p_form.save_m2m() # Important pour les relations ManyToMany (Matières/Niveaux)
                 
                 messages.success(request, "Votre profil a été mis à jour avec succès !")
                 return redirect('dashboard')
@@ -69,7 +72,20 @@ def dashboard(request):
             profile = ParentProfile.objects.create(user=user)
 
         # Récupération de l'historique des demandes (du plus récent au plus ancien)
-        my_requests = CourseRequest.objects.filter(parent=user).order_by('-created_at')
+        my_requests = (CourseRequest.objects.filter(parent=user)
+                       .select_related('level', 'city').prefetch_related('subjects')
+                       .order_by('-created_at'))
+
+        # Profs suggérés par le moteur de matching pour la dernière demande active
+        suggested_tutors = []
+        latest_request = my_requests.filter(status='active').first()
+        if latest_request:
+            suggested_tutors = (TutorProfile.objects
+                                .filter(request_matches__request=latest_request, status='validated')
+                                .select_related('user')
+                                .order_by('-request_matches__score')[:6])
+        # Suggestions pas encore calculées (file du matching, cf. marketplace/matching.py)
+        matching_pending = latest_request is not None and latest_request.match_queued_at is not None
 
         if request.method == 'POST':
             u_form = UserUpdateForm(request.POST, instance=user)
@@ -89,6 +105,8 @@ def dashboard(request):
             'p_form': p_form,
             'profile': profile,
             'my_requests': my_requests, # Liste des demandes pour l'historique
+            'suggested_tutors': suggested_tutors,
+            'matching_pending': matching_pending,
         }
         return render(request, 'profiles/dashboard_parent.html', context)
 
@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+
+En plus de Django, on sert ici le WebSocket de la messagerie temps réel
+(apps/communication/realtime.py). Ex : uvicorn config.asgi:application
 """
 
 import os
@@ -13,4 +16,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Après get_asgi_application() : les apps doivent être chargées
+from django.conf import settings  # noqa: E402
+from apps.communication.realtime import websocket_app  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if settings.REALTIME_ENABLED and scope['path'] == settings.REALTIME_WEBSOCKET_PATH:
+            return await websocket_app(scope, receive, send)
+        await receive()
+        return await send({'type': 'websocket.close', 'code': 4404})
+    return await django_application(scope, receive, send)
@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Juste après Security
+    'apps.core.query_inspector.QueryInspectorMiddleware',  # Compte les requêtes SQL (sessions et auth compris)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',   # Indispensable pour le changement de langue (après Session, avant Common)
     'django.middleware.common.CommonMiddleware',
@@ -100,6 +101,16 @@ DATABASES = {
     )
 }
 
+# Cache (cartes de l'annuaire...). Mémoire locale par processus :
+# le défaut de Django (300 entrées) est trop petit pour une carte par prof.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'polynova',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 # 7. Authentification Personnalisée
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
@@ -145,11 +156,44 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # 11. Fichiers Média (Uploads utilisateurs)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Déclinaisons redimensionnées des images (apps/core/images.py) : générées dans un thread
+# du processus, après la réponse. False : tout de suite, dans la requête.
+IMAGE_DERIVATIVES_IN_BACKGROUND = True
 
 # Configuration ID par défaut
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# 12. Configuration de Production (Render)
+# 12. Inspection des requêtes SQL (apps/core/query_inspector.py)
+# Budget max de requêtes par nom d'URL + détection des N+1.
+# En tests un dépassement fait échouer le test, ailleurs il est journalisé.
+# Origine de chaque requête (parcours de la pile, coûteux) : DEBUG et tests seulement.
+QUERY_INSPECTOR_ENABLED = os.environ.get('QUERY_INSPECTOR', '1') == '1'
+QUERY_BUDGET_STRICT = len(sys.argv) > 1 and sys.argv[1] == 'test'
+QUERY_INSPECTOR_ORIGINS = DEBUG or QUERY_BUDGET_STRICT
+QUERY_NPLUSONE_THRESHOLD = 5
+QUERY_BUDGET_DEFAULT = 30
+QUERY_BUDGETS = {
+    'home': 10,
+    'tutor_list': 12,
+    'tutor_list_more': 8,
+    'tutor_detail': 15,
+    'request_list': 14,
+    'request_list_more': 8,
+    'actualites:list': 12,
+    'actualites:category': 12,
+    'actualites:detail': 12,
+}
+
+# 13. Messagerie temps réel (apps/communication/realtime.py, servie par config/asgi.py)
+# InMemoryHub pour un seul processus ; SocketHub dès qu'il y a plusieurs workers ASGI sur la machine.
+# REALTIME=1 seulement si le site est servi en ASGI (uvicorn config.asgi:application) :
+# sous WSGI (Procfile : gunicorn) personne n'écoute, rien n'est publié.
+REALTIME_ENABLED = os.environ.get('REALTIME', '0') == '1'
+REALTIME_HUB = os.environ.get('REALTIME_HUB', 'apps.communication.pubsub.InMemoryHub')
+REALTIME_SOCKET_DIR = os.environ.get('REALTIME_SOCKET_DIR', '/tmp/polynova-realtime')
+REALTIME_WEBSOCKET_PATH = '/ws/messagerie/'
+
+# 14. Configuration de Production (Render)
 if not DEBUG:
     # Sécurité HTTPS
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')